@@ -0,0 +1,654 @@
+"""
+ Benchmark suite for the convolution, transform, LTI
+ and WFDB decoding code of this project.
+
+ Every benchmark is a setup function registered over a grid
+ of parameters, it prepares the data and returns the call to
+ be timed. Each case is warmed up, then timed `repeat` times
+ with enough calls per repeat to last at least `min_time`.
+ With --memory the peak of memory traced during one call
+ is recorded as well.
+
+ python benchmark.py list
+ python benchmark.py run -o results.json [-k conv] [--repeat 5] [--memory]
+ python benchmark.py compare base.json results.json [--threshold 0.1]
+"""
+import argparse
+import itertools
+import json
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str, **grid):
+    """
+    Registers a setup function to be run over
+    every combination of the parameter grid.
+    """
+    def register(setup):
+        BENCHMARKS[name] = (setup, grid)
+        return setup
+    return register
+
+
+def cases(pattern: str = None):
+    """
+    Yields (name, params, setup) of every benchmark
+    case whose name matches the regex pattern.
+    """
+    for name, (setup, grid) in BENCHMARKS.items():
+        if pattern and not re.search(pattern, name):
+            continue
+        keys = list(grid)
+        for values in itertools.product(*(grid[k] for k in keys)):
+            yield name, dict(zip(keys, values)), setup
+
+
+def time_case(func, repeat: int = 5, warmup: int = 1, min_time: float = 0.05) -> dict:
+    """
+    Returns statistics of the time (sec.) of one call of func.
+    """
+    for _ in range(warmup):
+        func()
+
+    # calls per repeat so that timer resolution doesn't matter
+    number = 1
+    while True:
+        t1 = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - t1
+        if elapsed >= min_time or number >= pow(10,6):
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    times = []
+    for _ in range(repeat):
+        t1 = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - t1) / number)
+
+    return {
+        'min': min(times),
+        'median': float(np.median(times)),
+        'mean': float(np.mean(times)),
+        'stdev': float(np.std(times)),
+        'number': number,
+        'times': times,
+    }
+
+
+def peak_memory(func) -> int:
+    """
+    Returns peak bytes allocated (numpy buffers included)
+    during one call of func, above what was already in use.
+    """
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak - base
+
+
+def run(pattern: str = None, repeat: int = 5, warmup: int = 1,
+        min_time: float = 0.05, memory: bool = False, verbose: bool = True) -> dict:
+    """
+    Runs all matching benchmark cases, returns the results.
+    """
+    results = []
+    for name, params, setup in cases(pattern):
+        func = setup(**params)
+        stats = time_case(func, repeat, warmup, min_time)
+        if memory:
+            stats['peak_bytes'] = peak_memory(func)
+        results.append({'name': name, 'params': params, **stats})
+        if verbose:
+            mem = f' {stats["peak_bytes"] / pow(2,20):9.2f} MiB' if memory else ''
+            print(f'{name:<32} {_format_params(params):<36} '
+                    f'{_format_time(stats["median"]):>10} '
+                    f'± {100 * stats["stdev"] / stats["median"]:4.1f}%{mem}')
+
+    return {
+        'meta': {
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'machine': platform.node(),
+            'processor': platform.processor() or platform.machine(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'repeat': repeat,
+            'warmup': warmup,
+        },
+        'results': results,
+    }
+
+
+def compare(base: dict, new: dict, threshold: float = 0.1) -> list:
+    """
+    Compares median times of cases present in both result sets.
+    Returns the cases slower than base by more than threshold.
+    """
+    def key(r):
+        return r['name'], json.dumps(r['params'], sort_keys=True)
+
+    base_results = {key(r): r for r in base['results']}
+    regressions = []
+    print(f'{"benchmark":<32} {"params":<36} {"base":>10} {"new":>10} {"ratio":>7}')
+    for r in new['results']:
+        b = base_results.get(key(r))
+        if b is None:
+            continue
+        ratio = r['median'] / b['median']
+        if ratio > 1 + threshold:
+            flag = 'SLOWER'
+            regressions.append((r['name'], r['params'], ratio))
+        elif ratio < 1 / (1 + threshold):
+            flag = 'faster'
+        else:
+            flag = ''
+        print(f'{r["name"]:<32} {_format_params(r["params"]):<36} '
+                f'{_format_time(b["median"]):>10} {_format_time(r["median"]):>10} '
+                f'{ratio:>7.2f} {flag}')
+
+    print(f'{len(regressions)} regression(s) beyond {100 * threshold:.0f}%')
+    return regressions
+
+
+def _format_params(params: dict) -> str:
+    return ', '.join(f'{k}={v}' for k, v in params.items())
+
+
+def _format_time(t: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if t >= scale:
+            return f'{t / scale:.3f} {unit}'
+    return f'{t / 1e-9:.1f} ns'
+
+
+def _rng():
+    return np.random.default_rng(0)
+
+
+### convolution
+
+@benchmark('conv.np_convolve', Nx=[pow(10,4), pow(10,5)], Nh=[31, 255, 2047])
+def _(Nx, Nh):
+    x, h = _rng().normal(0, 1, Nx), _rng().normal(0, 1, Nh)
+    return lambda: np.convolve(x, h)
+
+
+@benchmark('convolution.conv_fft', Nx=[pow(10,4), pow(10,5)], Nh=[31, 255, 2047])
+def _(Nx, Nh):
+    from convolution import conv_fft
+    x, h = _rng().normal(0, 1, Nx), _rng().normal(0, 1, Nh)
+    return lambda: conv_fft(x, h)
+
+
+# the 10^5 x 10^4 case of the former fft_conv_perf.py
+@benchmark('convolution.fft_conv_perf', Nx=[pow(10,5)], Nh=[pow(10,4)],
+           method=['direct', 'fft', 'overlap_add'])
+def _(Nx, Nh, method):
+    from convolution import convolve
+    x, h = _rng().normal(0, 1, Nx), _rng().normal(0, 1, Nh)
+    return lambda: convolve(x, h, method=method)
+
+
+@benchmark('conv_overlap_add.loop', Nx=[1024], Nh=[3, 31], N1=[64])
+def _(Nx, Nh, N1):
+    from conv_overlap_add import conv_overlap_add
+    x, h = _rng().normal(0, 1, Nx), _rng().normal(0, 1, Nh)
+    return lambda: conv_overlap_add(h, x, N1)
+
+
+@benchmark('conv_overlap_add.fft', Nx=[pow(10,5), 650000], Nh=[31, 255, 2047])
+def _(Nx, Nh):
+    from conv_overlap_add import conv_overlap_add_fft
+    from convolution import block_size
+    x, h = _rng().normal(0, 1, Nx), _rng().normal(0, 1, Nh)
+    N1, _ = block_size(Nh)
+    return lambda: conv_overlap_add_fft(h, x, N1)
+
+
+@benchmark('conv_overlap_add.fft_12lead', Nx=[pow(10,5)], Nh=[255])
+def _(Nx, Nh):
+    from conv_overlap_add import conv_overlap_add_fft
+    from convolution import block_size
+    x, h = _rng().normal(0, 1, (Nx, 12)), _rng().normal(0, 1, Nh)
+    N1, _ = block_size(Nh)
+    return lambda: conv_overlap_add_fft(h, x, N1, axis=0)
+
+
+@benchmark('conv_overlap_save.loop', Nx=[1024], Nh=[3, 31], N1=[64])
+def _(Nx, Nh, N1):
+    from conv_overlap_save import conv_overlap_save
+    # the loop needs its last frame to end exactly at the last sample
+    hop = N1 - Nh + 1
+    Nx2 = N1 + -(-(Nx - N1) // hop) * hop
+    x, h = np.r_[_rng().normal(0, 1, Nx), np.zeros(Nx2 - Nx)], _rng().normal(0, 1, Nh)
+    return lambda: conv_overlap_save(h, x, N1)
+
+
+@benchmark('conv_overlap_save.block', Nx=[pow(10,5)], Nh=[31, 255], block=[360, 4096])
+def _(Nx, Nh, block):
+    from conv_overlap_save import BlockConvolver
+    from convolution import block_size
+    x, h = _rng().normal(0, 1, Nx), _rng().normal(0, 1, Nh)
+    N1, _ = block_size(Nh)
+
+    def stream():
+        conv = BlockConvolver(h, N1)
+        for cnt in range(0, Nx, block):
+            conv.process(x[cnt : cnt + block])
+        conv.flush()
+    return stream
+
+
+### transforms
+
+@benchmark('dct.dct', N=[64, 256, pow(2,16), pow(10,6)])
+def _(N):
+    from dct import dct
+    x = _rng().normal(0, 1, N)
+    return lambda: dct(x)
+
+
+@benchmark('dct.idct', N=[64, 256, pow(2,16), pow(10,6)])
+def _(N):
+    from dct import idct
+    X = _rng().normal(0, 1, N)
+    return lambda: idct(X)
+
+
+@benchmark('dct.dct_batch', batch=[12, 1000], N=[64, 5000])
+def _(batch, N):
+    from dct import dct
+    x = _rng().normal(0, 1, (batch, N))
+    return lambda: dct(x, axis=1)
+
+
+# 8x8 blocks of a 512x512 image and frames of an audio feature extractor
+@benchmark('dct.dct_small', batch=[1, 4096], N=[8, 32, 64],
+           path=['matrix', 'fft'])
+def _(batch, N, path):
+    import dct
+    x = _rng().normal(0, 1, (batch, N))
+    if path == 'fft':
+        return lambda: dct._dct_fft(x)
+    return lambda: dct.dct(x)
+
+
+@benchmark('dct.dct_direct', N=[64, 256])
+def _(N):
+    from dct import dct_direct
+    x = _rng().normal(0, 1, N)
+    return lambda: dct_direct(x)
+
+
+@benchmark('img_codec.encode', image=['img/fir_windows.png',
+           'img/window_functions_table.png'], B=[8, 16])
+def _(image, B):
+    import img_codec
+    img = img_codec.load_gray(image)
+    return lambda: img_codec.encode(img, B)
+
+
+@benchmark('img_codec.decode', image=['img/fir_windows.png',
+           'img/window_functions_table.png'], B=[8, 16])
+def _(image, B):
+    import img_codec
+    img = img_codec.load_gray(image)
+    q, Q = img_codec.encode(img, B)
+    return lambda: img_codec.decode(q, Q, img.shape)
+
+
+@benchmark('dht.dht', N=[400, pow(2,16), pow(10,6)])
+def _(N):
+    from dht import dht
+    x = _rng().normal(0, 1, N)
+    return lambda: dht(x)
+
+
+@benchmark('dht.dht_inplace', N=[400, pow(2,16), pow(10,6)])
+def _(N):
+    from dht import dht
+    x = _rng().normal(0, 1, N)
+    scale = 1 / np.sqrt(N)
+
+    def fht_inplace():
+        dht(x, overwrite_x=True)
+        np.multiply(x, scale, out=x)  # orthonormal, repeated calls stay bounded
+    return fht_inplace
+
+
+@benchmark('dht.dht_complex', N=[400, pow(2,16), pow(10,6)])
+def _(N):
+    from dht import dht_complex
+    x = _rng().normal(0, 1, N)
+    return lambda: dht_complex(x)
+
+
+@benchmark('dht.dht_batch', batch=[12], N=[pow(10,5)])
+def _(batch, N):
+    from dht import dht
+    x = _rng().normal(0, 1, (N, batch))
+    return lambda: dht(x, axis=0)
+
+
+@benchmark('dht.dht_direct', N=[64, 256])
+def _(N):
+    from dht import dht_direct
+    x = _rng().normal(0, 1, N)
+    return lambda: dht_direct(x)
+
+
+@benchmark('stft.stft', N=[22050 * 10], frame_len=[256, 1024, 4096])
+def _(N, frame_len):
+    import stft
+    x = _rng().normal(0, 1, N)
+
+    def run():
+        for _ in stft.stft(x, frame_len):
+            pass
+    return run
+
+
+@benchmark('stft.istft', N=[22050 * 10], frame_len=[256, 1024, 4096])
+def _(N, frame_len):
+    import stft
+    x = _rng().normal(0, 1, N)
+
+    def run():
+        for _ in stft.istft(stft.stft(x, frame_len), frame_len):
+            pass
+    return run
+
+
+@benchmark('tone_tracker.sliding_dft', Nx=[pow(10,5)], N=[360, 4096], bins=[1, 3],
+           block=[1000])
+def _(Nx, N, bins, block):
+    from tone_tracker import SlidingDFT
+    x = _rng().normal(0, 1, Nx)
+
+    def run():
+        sdft = SlidingDFT(np.arange(1, bins + 1), N, N)
+        for cnt in range(0, Nx, block):
+            sdft.process(x[cnt : cnt + block])
+    return run
+
+
+@benchmark('tone_tracker.goertzel', Nx=[pow(10,5)], N=[360, 4096], bins=[1, 3],
+           block=[1000])
+def _(Nx, N, bins, block):
+    from tone_tracker import Goertzel
+    x = _rng().normal(0, 1, Nx)
+
+    def run():
+        goertzel = Goertzel(np.arange(1, bins + 1), N, N)
+        for cnt in range(0, Nx, block):
+            goertzel.process(x[cnt : cnt + block])
+    return run
+
+
+@benchmark('tone_tracker.rfft_bins', Nx=[pow(10,5)], N=[360, 4096], hop=['N', 16])
+def _(Nx, N, hop):
+    from tone_tracker import rfft_bins
+    x = _rng().normal(0, 1, Nx)
+    return lambda: rfft_bins(x, [1, 2, 3], N, N, hop=N if hop == 'N' else hop)
+
+
+### LTI systems
+
+@benchmark('lti.system_response_fft', order=[2, 30], N=[512, 8192])
+def _(order, N):
+    from lti import system_response_fft
+    num, den = _rng().normal(0, 1, order + 1), np.r_[1.0, np.zeros(order)]
+    return lambda: system_response_fft(num, den, N)
+
+
+@benchmark('lti.system_response_series', order=[2, 30], N=[512, 8192])
+def _(order, N):
+    from lti import system_response_series
+    num, den = _rng().normal(0, 1, order + 1), np.r_[1.0, np.zeros(order)]
+    return lambda: system_response_series(num, den, N)
+
+
+@benchmark('lti.system_response_series_batch', filters=[100, 1000], order=[30], N=[512])
+def _(filters, order, N):
+    from lti import system_response_series
+    num = _rng().normal(0, 1, (filters, order + 1))
+    return lambda: system_response_series(num, [1.0], N)
+
+
+# |H| of windowed FIR LPFs from folded taps vs. Horner's rule over all taps
+@benchmark('lti.amplitude_response', taps=[3, 31, 101], filters=[1, 100], N=[512],
+           method=['folded', 'horner'])
+def _(taps, filters, N, method):
+    from scipy import signal
+    from lti import amplitude_response, _horner
+    num = np.stack([signal.firwin(taps, fc) for fc in np.linspace(0.1, 0.4, filters)])
+    if method == 'folded':
+        return lambda: np.abs(amplitude_response(num, N))
+    return lambda: np.abs(_horner(num, np.exp(-2j * np.pi * np.arange(N) / N)))
+
+
+# complete H(w) of linear phase FIRs: folded taps & the delay
+# exp(-jw(M-1)/2) vs. Horner's rule over all taps, the crossover
+# sets lti._FOLD_MIN_TAPS
+@benchmark('lti.system_response_series_fir', taps=[31, 81, 255], filters=[1, 100],
+           N=[512, 8192], method=['folded', 'horner'])
+def _(taps, filters, N, method):
+    from scipy import signal
+    from lti import _folded_amplitude, _horner
+    num = np.stack([signal.firwin(taps, fc) for fc in np.linspace(0.1, 0.4, filters)])
+    om = np.linspace(0, 2 * np.pi, N)
+    if method == 'folded':
+        return lambda: _folded_amplitude(num, om, 1) * np.exp(-1j * (taps - 1) / 2 * om)
+    return lambda: _horner(num, np.exp(-1j * om))
+
+
+def _lpf_stack(filters, N):
+    from scipy import signal
+    taps = 21 + 2 * (np.arange(filters) % 40)
+    num = np.zeros((filters, taps.max()))
+    for cnt, n_taps in enumerate(taps):
+        num[cnt, 0:n_taps] = signal.firwin(n_taps, 0.25, window='hann')
+    f = np.linspace(0, 0.5, N)
+    return f, np.abs(np.fft.rfft(num, 2 * (N - 1), axis=-1))
+
+
+@benchmark('lti.find_cutoff', filters=[1000], N=[1024], method=['batch', 'loop'])
+def _(filters, N, method):
+    from lti import find_cutoff, find_lpf_cutoff
+    f, H_abs = _lpf_stack(filters, N)
+    if method == 'loop':
+        return lambda: [find_lpf_cutoff(f, H) for H in H_abs]
+    return lambda: find_cutoff(f, H_abs, 'lpf')
+
+
+@benchmark('lti.find_stopband', filters=[1000], N=[1024], method=['batch', 'loop'])
+def _(filters, N, method):
+    from lti import find_stopband, find_lpf_stopband
+    f, H_abs = _lpf_stack(filters, N)
+    if method == 'loop':
+        return lambda: [find_lpf_stopband(f, H, 40) for H in H_abs]
+    return lambda: find_stopband(f, H_abs, 40, 'lpf')
+
+
+@benchmark('lti.zoom_response', order=[2, 30], M=[64, 1024])
+def _(order, M):
+    from lti import zoom_response
+    num, den = _rng().normal(0, 1, order + 1), np.r_[1.0, np.zeros(order)]
+    return lambda: zoom_response(num, den, 240.0, 260.0, M, 1000.0)
+
+
+# cutoff of windowed FIR LPF to 1 mHz at Fs = 8 kHz:
+# zoom & refine around a 1024 point grid vs. one 2^23 point FFT
+@benchmark('lti.cutoff_1mHz', method=['refine_edge', 'fft'])
+def _(method):
+    from scipy import signal
+    from lti import system_response_fft, find_lpf_cutoff, refine_edge
+    Fs = 8000
+    num = signal.firwin(31, 2000, width=800, window='hann', fs=Fs)
+    den = np.r_[1.0, np.zeros(30)]
+    if method == 'fft':
+        N = pow(2, 23)
+        return lambda: find_lpf_cutoff(np.arange(N) * Fs / N,
+                                       np.abs(system_response_fft(num, den, N)[0]))
+
+    def run():
+        f, H = signal.freqz(num, den, worN=1024, fs=Fs)
+        H_abs = np.abs(H)
+        fc = find_lpf_cutoff(f, H_abs)
+        return refine_edge(num, den, fc - 2 * f[1], fc + 2 * f[1],
+                           np.max(H_abs) / np.sqrt(2), Fs, tol=1e-3)
+    return run
+
+
+# windowed FIR LPF analysed once vs. every access of a lazy Filter
+@benchmark('filters.analysis', access=['first', 'cached'])
+def _(access):
+    from scipy import signal
+    from filters import Filter
+    Fs = 8000
+    num = signal.firwin(31, 2000, width=800, window='hann', fs=Fs)
+
+    def analyse(filt):
+        return filt.H_abs, filt.cutoff, filt.stopband(40), filt.zeros
+    if access == 'first':
+        return lambda: analyse(Filter(num, 1.0, Fs, band='lpf', N_FFT=2048))
+    filt = Filter(num, 1.0, Fs, band='lpf', N_FFT=2048)
+    analyse(filt)
+    return lambda: analyse(filt)
+
+
+### FIR design
+
+@benchmark('fir_design.evaluate', band=['lpf', 'bsf'], designs=[400], N=[4096])
+def _(band, designs, N):
+    from fir_design import evaluate, WINDOWS
+    grid = [(n_taps, window) for n_taps in range(3, 1000, 2) for window in WINDOWS][0:designs]
+    edges = {'lpf': (2000, 2800), 'bsf': ([1200, 3800], [2000, 3000])}[band]
+    return lambda: evaluate(grid, band, *edges, 40, 8000, N)
+
+
+### streaming filters
+
+@benchmark('stream_filter.process', record=['data/ecg/100.dat'], order=[2, 8],
+           block=[64, 360, 4096])
+def _(record, order, block):
+    from scipy import signal
+    from stream_filter import StreamFilter, read_mitbih
+    ECG = read_mitbih(record)
+    num, den = signal.butter(order // 2, [0.5, 40], btype='bandpass', fs=360)
+
+    def run():
+        filt = StreamFilter(num, den)
+        for cnt in range(0, ECG.shape[1], block):
+            filt.process(ECG[:, cnt : cnt + block])
+    return run
+
+
+@benchmark('stream_filter.high_order', record=['data/ecg/100.dat'], order=[8, 12],
+           form=['direct', 'sos'], dtype=['float64', 'float32'])
+def _(record, order, form, dtype):
+    from scipy import signal
+    from lti import tf2sos
+    from stream_filter import StreamFilter, SOSFilter, read_mitbih
+    x = read_mitbih(record)[0]
+    num, den = signal.butter(order, 10, fs=360)
+    sos = tf2sos(num, den)
+
+    def run():
+        if form == 'direct':
+            filt = StreamFilter(num, den, dtype=dtype)
+        else:
+            filt = SOSFilter(sos, dtype=dtype)
+        for cnt in range(0, len(x), 4096):
+            filt.process(x[cnt : cnt + 4096])
+    return run
+
+
+@benchmark('lti.sos_response_fft', order=[8, 12], N=[512, 8192])
+def _(order, N):
+    from scipy import signal
+    from lti import sos_response_fft
+    sos = signal.butter(order, 0.1, output='sos')
+    return lambda: sos_response_fft(sos, N)
+
+
+### WFDB decoding
+
+@benchmark('wfutils.read_uint12', record=['data/ecg/100.dat'])
+def _(record):
+    from wfutils import read_uint12
+    with open(record, 'rb') as file:
+        byte_content = file.read()
+    return lambda: read_uint12(byte_content)
+
+
+@benchmark('wfutils.read_uint16', record=['data/ecg/ath_001.dat'])
+def _(record):
+    from wfutils import read_uint16
+    with open(record, 'rb') as file:
+        byte_content = file.read()
+    return lambda: read_uint16(byte_content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DSP benchmark suite')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_list = sub.add_parser('list', help='list benchmark cases')
+    p_list.add_argument('-k', '--filter', help='regex on benchmark names')
+
+    p_run = sub.add_parser('run', help='run benchmarks')
+    p_run.add_argument('-k', '--filter', help='regex on benchmark names')
+    p_run.add_argument('-o', '--output', help='JSON file for the results')
+    p_run.add_argument('--repeat', type=int, default=5)
+    p_run.add_argument('--warmup', type=int, default=1)
+    p_run.add_argument('--min-time', type=float, default=0.05,
+                       help='min. seconds per repeat')
+    p_run.add_argument('--memory', action='store_true',
+                       help='also record peak memory of one call')
+
+    p_cmp = sub.add_parser('compare', help='compare two result files')
+    p_cmp.add_argument('base')
+    p_cmp.add_argument('new')
+    p_cmp.add_argument('--threshold', type=float, default=0.1,
+                       help='relative slowdown flagged as regression')
+
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for name, params, _ in cases(args.filter):
+            print(f'{name:<32} {_format_params(params)}')
+
+    elif args.command == 'run':
+        results = run(args.filter, args.repeat, args.warmup, args.min_time,
+                      args.memory)
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump(results, file, indent=2)
+            print(f'results written to {args.output}')
+
+    elif args.command == 'compare':
+        with open(args.base) as file:
+            base = json.load(file)
+        with open(args.new) as file:
+            new = json.load(file)
+        if compare(base, new, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# latency & memory per block of the streaming overlap & save convolver
+import numpy as np
+import time
+import tracemalloc
+
+from conv_overlap_save import BlockConvolver
+
+Fs = 360            # MIT-BIH sampling rate
+Block = 360         # 1 sec. of ECG per call
+Nh = 255
+N1 = 769            # N_FFT = 1024
+Nblocks = 1000
+
+x = np.random.normal(0, 1, Block * Nblocks)
+h = np.random.normal(0, 1, Nh)
+conv = BlockConvolver(h, N1)
+
+# equal output to the linear convolution
+y = np.concatenate([conv.process(x[cnt : cnt + Block])
+                    for cnt in range(0, len(x), Block)] + [conv.flush()])
+Diff = np.max(np.abs(y - np.convolve(x, h)))
+print(f'max |y_linear - y_stream| = {Diff:.3e}')
+
+# latency per block
+latency = np.zeros(Nblocks)
+for cnt in range(Nblocks):
+    block = x[cnt * Block : (cnt + 1) * Block]
+    t1 = time.perf_counter()
+    conv.process(block)
+    latency[cnt] = time.perf_counter() - t1
+
+print(f'block of {Block} samples, N_FFT = {conv.N_FFT}')
+print(f'latency per block: mean = {1e6 * np.mean(latency):.1f} us, '
+        f'p99 = {1e6 * np.percentile(latency, 99):.1f} us, '
+        f'max = {1e6 * np.max(latency):.1f} us')
+print(f'real-time factor = {(Block / Fs) / np.mean(latency):.0f}x')
+
+# allocations in steady state: nothing should be retained between calls
+tracemalloc.start()
+conv.process(x[0:Block])
+snap1 = tracemalloc.take_snapshot()
+tracemalloc.reset_peak()
+base = tracemalloc.get_traced_memory()[0]
+for cnt in range(100):
+    conv.process(x[cnt * Block : (cnt + 1) * Block])
+current, peak = tracemalloc.get_traced_memory()
+snap2 = tracemalloc.take_snapshot()
+tracemalloc.stop()
+
+stats = snap2.compare_to(snap1, 'filename')
+retained_blocks = sum(max(st.count_diff, 0) for st in stats)
+print(f'peak transient memory per block = {(peak - base) / 1024:.1f} KiB')
+print(f'retained after 100 blocks = {current - base} bytes '
+        f'in {retained_blocks} allocations')
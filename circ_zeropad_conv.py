@@ -1,5 +1,7 @@
 import numpy as np
 
+from fftutils import next_fast_len
+
 x = np.linspace(1., 8., 8)
 h = [-10.0, -11.0, -12.0]
 len_x = len(x)
@@ -14,15 +16,11 @@ print(f'Y_linear(n) = {y_linear}')
 
 # Circular convolution with zero padding
 N = len_x + len_h - 1
-X = np.fft.fft(x, N) # if len(x) < N, zero pads the sequence
-H = np.fft.fft(h, N)
+N_FFT = next_fast_len(N) # 2^a 3^b 5^c length, padded further with zeros
+X = np.fft.rfft(x, N_FFT) # real input, no imaginary residue in the result
+H = np.fft.rfft(h, N_FFT)
 y_circular = np.multiply(X, H)
-y_circular = np.fft.ifft(y_circular)
-y_imag = y_circular.imag
-y_real = y_circular.real
-fnd = abs(y_imag) < 0.0000001
-y_imag[fnd] = 0
-y_circular.imag = y_imag
-print(f'y_circular(n) = {y_circular.real}')
+y_circular = np.fft.irfft(y_circular, N_FFT)[0:N]
+print(f'y_circular(n) = {y_circular}')
 
 #freq = np.fft.fftfreq(t.shape[-1])
@@ -0,0 +1,57 @@
+# out-of-core overlap & save: throughput and peak memory
+import os
+import resource
+import tempfile
+import numpy as np
+import time
+
+from conv_overlap_save import conv_overlap_save_memmap
+
+
+def peak_rss_mib():
+    """
+    Returns peak resident set size of this process in MiB.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    Nx = pow(2, 26)     # 512 MiB of float64 samples
+    Chunk = pow(2, 18)
+    Nh = 255
+    N1 = 1794           # N_FFT = 2048
+    h = np.random.normal(0, 1, Nh)
+    tmp_dir = tempfile.mkdtemp()
+    x_file = os.path.join(tmp_dir, 'x.dat')
+    y_file = os.path.join(tmp_dir, 'y.dat')
+
+    # write the input in chunks, never holding it in memory
+    rng = np.random.default_rng(0)
+    with open(x_file, 'wb') as file:
+        for _ in range(Nx // Chunk):
+            rng.normal(0, 1, Chunk).tofile(file)
+
+    rss0 = peak_rss_mib()
+    t1 = time.perf_counter()
+    y = conv_overlap_save_memmap(h, x_file, y_file, N1, chunk=Chunk)
+    elapsed = time.perf_counter() - t1
+    rss1 = peak_rss_mib()
+
+    # y(n) up to n only depends on x up to n
+    x0 = np.fromfile(x_file, count=pow(10,5))
+    Diff = np.max(np.abs(y[0:pow(10,5)] - np.convolve(x0, h)[0:pow(10,5)]))
+
+    print(f'Nx = {Nx} ({Nx * 8 / 2**20:.0f} MiB), Nh = {Nh}, chunk = {Chunk}')
+    print(f'time = {elapsed:.2f} sec., {Nx / elapsed:.3e} samples/s, '
+            f'{Nx * 8 / 2**20 / elapsed:.0f} MiB/s')
+    print(f'peak RSS before = {rss0:.0f} MiB, after = {rss1:.0f} MiB')
+    print(f'max |y_linear - y| on first 10^5 samples = {Diff:.3e}')
+
+    del y
+    os.remove(x_file)
+    os.remove(y_file)
+    os.rmdir(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
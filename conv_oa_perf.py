@@ -0,0 +1,42 @@
+# throughput of FFT overlap & add against linear convolution
+import numpy as np
+import time
+
+from conv_overlap_add import conv_overlap_add_fft
+from convolution import block_size
+from fftutils import next_fast_len
+
+Nx_grid = [pow(10,4), pow(10,5), 650000]  # 650000 ~ one MIT-BIH record
+Nh_grid = [3, 31, 255, 2047]
+Repeats = 3
+
+
+def best_time(func, *args):
+    """
+    Returns the best of Repeats wall clock timings of func(*args).
+    """
+    func(*args)  # warm up
+    elapsed = []
+    for _ in range(Repeats):
+        t1 = time.perf_counter()
+        func(*args)
+        elapsed.append(time.perf_counter() - t1)
+    return min(elapsed)
+
+
+print(f'{"Nx":>8} {"Nh":>6} {"N1":>6} {"N_FFT":>6} '
+        f'{"np.convolve (S/s)":>18} {"overlap-add (S/s)":>18} {"ratio":>7}')
+
+for Nx in Nx_grid:
+    x = np.random.normal(0, 1, Nx)
+    for Nh in Nh_grid:
+        h = np.random.normal(0, 1, Nh)
+        # same blocks as convolution.convolve, 5-smooth FFT lengths
+        N1, _ = block_size(Nh)
+        N_FFT = next_fast_len(N1 + Nh - 1)
+
+        elapsed1 = best_time(np.convolve, x, h)
+        elapsed2 = best_time(conv_overlap_add_fft, h, x, N1)
+        print(f'{Nx:>8} {Nh:>6} {N1:>6} {N_FFT:>6} '
+                f'{Nx / elapsed1:>18.3e} {Nx / elapsed2:>18.3e} '
+                f'{elapsed1 / elapsed2:>7.2f}')
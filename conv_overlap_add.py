@@ -1,6 +1,10 @@
 # Convolution of long sequence using overlap and add method
+import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 
+from fftutils import next_fast_len, is_real, fft_forward, fft_inverse, filter_spectrum
+
 
 def conv_overlap_add(h, x, N1):
     """
@@ -48,6 +52,120 @@ def conv_overlap_add(h, x, N1):
     return y_OA
 
 
+def conv_overlap_add_fft(h, x, N1, axis=-1):
+    """
+    Computes response of a system (h) for a
+    long input sequence (x) using overlap & add (N1).
+
+    Every block of N1 samples is convolved with h
+    in frequency domain in a single batched FFT and
+    the overlapping tails are added with array slices.
+    x does not need to be zero-padded by the caller.
+    For N-D x (e.g. ECG leads or stereo channels) all
+    channels share one spectrum of h.
+
+    arg:    h       impulse response of the system
+    arg:    x       input sequence(s)
+    arg:    N1      block length
+    arg:    axis    time axis of x
+
+    return:     y(n), x.shape[axis] + len(h) - 1 samples along axis
+    """
+    h = np.asarray(h)
+    x = np.moveaxis(np.asarray(x), axis, -1)
+    lead = x.shape[:-1]  # channels
+    Nx = x.shape[-1]
+    Nh = len(h)
+    N2 = N1 + Nh - 1
+    N_FFT = next_fast_len(N2)
+    real = is_real(x, h)
+    n_blocks = -(-Nx // N1)
+    n_tails = -(-N2 // N1)  # blocks touched by one block's output
+
+    # blocks of N1 samples, last one zero padded
+    x2 = np.zeros(lead + (n_blocks * N1,), dtype=np.result_type(x, h, float))
+    x2[..., 0:Nx] = x
+    x2 = np.reshape(x2, lead + (n_blocks, N1))
+
+    H = filter_spectrum(h, N_FFT, real)
+    Y = fft_inverse(fft_forward(x2, N_FFT, real) * H, N_FFT, real)
+
+    # add k-th N1 chunk of every block's output at block offset k
+    y_OA = np.zeros(lead + (n_blocks + n_tails, N1), dtype=Y.dtype)
+    for k in range(n_tails):
+        chunk = Y[..., k * N1 : min((k + 1) * N1, N2)]
+        y_OA[..., k : k + n_blocks, 0:chunk.shape[-1]] += chunk
+
+    y_OA = np.reshape(y_OA, lead + (-1,))[..., 0 : Nx + Nh - 1]
+    return np.moveaxis(y_OA, -1, axis)
+
+
+def _oa_segment(args):
+    """
+    Computes samples [start, stop) of conv_overlap_add_fft(h, x, N1).
+    x starts `context` blocks before start, so every output
+    sample is summed from the same blocks in the same order as
+    in a single call over the whole sequence.
+    """
+    h, x, N1, context, n_out = args
+    y = conv_overlap_add_fft(h, x, N1)
+    return y[..., context * N1 : context * N1 + n_out]
+
+
+def conv_overlap_add_parallel(h, x, N1, n_jobs=None, seg_blocks=None, axis=-1):
+    """
+    Computes response of a system (h) for a very long input
+    sequence (x) using overlap & add (N1) in a process pool.
+
+    x is split into segments of seg_blocks blocks. Each worker
+    also gets the blocks before its segment whose tails reach
+    into it, so segments are stitched without any addition and
+    the result is bit for bit equal to conv_overlap_add_fft().
+
+    arg:    h           impulse response of the system
+    arg:    x           input sequence(s)
+    arg:    N1          block length
+    arg:    n_jobs      no. of worker processes, all cores by default
+    arg:    seg_blocks  blocks per segment, 4 segments per worker by default
+    arg:    axis        time axis of x
+
+    return:     y(n), x.shape[axis] + len(h) - 1 samples along axis
+    """
+    h = np.asarray(h)
+    x = np.moveaxis(np.asarray(x), axis, -1)
+    Nx = x.shape[-1]
+    Nh = len(h)
+    n_jobs = n_jobs or os.cpu_count()
+    n_blocks = -(-Nx // N1)
+    context = -(-(N1 + Nh - 1) // N1) - 1  # blocks with tails in the next one
+    if seg_blocks is None:
+        seg_blocks = max(-(-n_blocks // (4 * n_jobs)), 1)
+
+    tasks, bounds = [], []
+    for b in range(0, n_blocks, seg_blocks):
+        start = b * N1
+        stop = min((b + seg_blocks) * N1, Nx)
+        first = max(b - context, 0)
+        if stop == Nx:  # the last segment also returns the tail
+            stop = Nx + Nh - 1
+        tasks.append((h, x[..., first * N1 : min((b + seg_blocks) * N1, Nx)],
+                      N1, b - first, stop - start))
+        bounds.append((start, stop))
+
+    y = np.empty(x.shape[:-1] + (Nx + Nh - 1,), dtype=np.result_type(x, h, float))
+    if n_jobs == 1 or len(tasks) == 1:
+        parts = map(_oa_segment, tasks)
+        for (start, stop), part in zip(bounds, parts):
+            y[..., start:stop] = part
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            parts = pool.map(_oa_segment, tasks)
+            for (start, stop), part in zip(bounds, parts):
+                y[..., start:stop] = part
+
+    return np.moveaxis(y, -1, axis)
+
+
 def main():
     x = np.linspace(1, 12, 12)
     h = [-1, -2, -3]
@@ -82,6 +200,12 @@ def main():
     print(f'y_overlap_and_add: {y_OA}')
     print(f'Diff = {Diff}')
 
+    ### overlap and add using FFT, no padding needed
+    y_OA_fft = conv_overlap_add_fft(h, x[0:Nx], N1)
+    Diff = np.sum(np.abs(y_linear - y_OA_fft))
+    print(f'y_overlap_and_add_fft: {y_OA_fft}')
+    print(f'Diff = {Diff}')
+
 
 if __name__ == '__main__':
     main()
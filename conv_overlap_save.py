@@ -1,6 +1,9 @@
 # Convolution of long sequence using overlap and save method
+import os
 import numpy as np
 
+from fftutils import next_fast_len, fft_forward, fft_inverse, filter_spectrum
+
 
 def conv_overlap_save(h, x, N1):
     """
@@ -52,6 +55,306 @@ def conv_overlap_save(h, x, N1):
     return y_OS
 
 
+def _check_complex(block, dtype):
+    if np.iscomplexobj(block) and dtype.kind != 'c':
+        raise ValueError(f'complex block for a {dtype} convolver, '
+                         f'give dtype=complex')
+
+
+class BlockConvolver:
+    """
+    Streaming convolution of a long sequence with a
+    system (h) using overlap & save.
+
+    The filter spectrum and the last Nh-1 input samples
+    are kept between calls of process(), so a sequence
+    can be filtered block by block. Concatenated outputs
+    equal np.convolve(x, h)[0:len(x)], the remaining
+    Nh-1 samples are returned by flush(). Blocks may be
+    N-D, all channels are filtered in the same FFT call.
+
+    arg:    h       impulse response of the system
+    arg:    N1      new samples per FFT frame
+    arg:    dtype   data type of the output, by default from h
+                    & the first block, so complex blocks stay complex
+    arg:    axis    time axis of the blocks
+    """
+
+    def __init__(self, h, N1, dtype=None, axis=-1):
+        self.h = np.asarray(h)
+        self.Nh = len(self.h)
+        self.N1 = N1
+        self.axis = axis
+        self.N_FFT = next_fast_len(N1 + self.Nh - 1)
+        self._dtype = dtype
+        self.dtype = None if dtype is None else self._setup(np.dtype(dtype))
+        # last Nh-1 input samples followed by the new ones,
+        # allocated for the channels of the first block
+        self._frame = None
+        self.frames = 0
+
+    def _setup(self, dtype):
+        self.real = not (np.iscomplexobj(self.h) or dtype.kind == 'c')
+        self.H = filter_spectrum(self.h, self.N_FFT, self.real)
+        return dtype
+
+    def _state(self, block):
+        lead = block.shape[:-1]
+        if self._frame is None:
+            if self.dtype is None:
+                self.dtype = self._setup(np.result_type(self.h, block, float))
+            self._frame = np.zeros(lead + (self.N_FFT,), dtype=self.dtype)
+        elif self._frame.shape[:-1] != lead:
+            raise ValueError(f'block has channels {lead}, '
+                             f'expected {self._frame.shape[:-1]}')
+        _check_complex(block, self.dtype)
+        return self._frame
+
+    def process(self, block):
+        """
+        Returns the next block.shape[axis] output samples.
+        """
+        block = np.moveaxis(np.asarray(block), self.axis, -1)
+        lead = block.shape[:-1]
+        Nb = block.shape[-1]
+        Nh = self.Nh
+        frame = self._state(block)
+        y = np.empty(lead + (Nb,), dtype=self.dtype)
+
+        start = 0
+        while start < Nb:
+            m = min(self.N1, Nb - start)
+            frame[..., Nh - 1 : Nh - 1 + m] = block[..., start : start + m]
+            frame[..., Nh - 1 + m :] = 0
+            Y = fft_inverse(fft_forward(frame, self.N_FFT, self.real) * self.H,
+                            self.N_FFT, self.real)
+            # first Nh-1 samples are wrapped around, discard them
+            y[..., start : start + m] = Y[..., Nh - 1 : Nh - 1 + m]
+            # save the overlap for the next frame
+            frame[..., 0 : Nh - 1] = frame[..., m : m + Nh - 1]
+            start += m
+            self.frames += 1
+
+        return np.moveaxis(y, -1, self.axis)
+
+    def flush(self):
+        """
+        Returns the last Nh-1 output samples and resets the state.
+        """
+        lead = () if self._frame is None else self._frame.shape[:-1]
+        tail = np.zeros(lead + (self.Nh - 1,), dtype=self.dtype)
+        y = self.process(np.moveaxis(tail, -1, self.axis))
+        self.reset()
+        return y
+
+    def reset(self):
+        """
+        Clears the saved input history.
+        """
+        self._frame = None
+        self.frames = 0
+        if self._dtype is None:
+            self.dtype = None
+
+
+class PartitionedConvolver:
+    """
+    Streaming convolution with a long impulse response (h)
+    using uniformly partitioned overlap & save.
+
+    h is split into partitions of B taps, each with its own
+    spectrum of 2B points. Spectra of past input frames are
+    kept in a frequency-domain delay line, so every frame of
+    B samples costs one FFT, one IFFT and a sum of products,
+    and latency is one block regardless of the length of h.
+
+    arg:    h       impulse response of the system
+    arg:    B       block length, process() takes multiples of it
+    arg:    dtype   data type of the output, by default from h
+                    & the first block, so complex blocks stay complex
+    arg:    axis    time axis of the blocks
+    """
+
+    def __init__(self, h, B, dtype=None, axis=-1):
+        self.h = np.asarray(h)
+        self.Nh = len(self.h)
+        self.B = B
+        self.P = -(-self.Nh // B)  # no. of partitions
+        self.axis = axis
+        self._dtype = dtype
+        self.dtype = None if dtype is None else self._setup(np.dtype(dtype))
+        # previous & current input block, and the delay line,
+        # allocated for the channels of the first block
+        self._frame = None
+        self._fdl = None
+        self.frames = 0
+
+    def _setup(self, dtype):
+        self.real = not (np.iscomplexobj(self.h) or dtype.kind == 'c')
+        h2 = np.zeros(self.P * self.B, dtype=self.h.dtype)
+        h2[0:self.Nh] = self.h
+        self.H = filter_spectrum(np.reshape(h2, (self.P, self.B)), 2 * self.B, self.real)
+        return dtype
+
+    def _state(self, block):
+        lead = block.shape[:-1]
+        if self._frame is None:
+            if self.dtype is None:
+                self.dtype = self._setup(np.result_type(self.h, block, float))
+            self._frame = np.zeros(lead + (2 * self.B,), dtype=self.dtype)
+            # every spectrum is stored twice, so the last P frames
+            # are always a contiguous (reversed) view
+            self._fdl = np.zeros((2 * self.P,) + lead + (self.H.shape[1],),
+                                 dtype=complex)
+        elif self._frame.shape[:-1] != lead:
+            raise ValueError(f'block has channels {lead}, '
+                             f'expected {self._frame.shape[:-1]}')
+        _check_complex(block, self.dtype)
+        return self._frame, self._fdl
+
+    def process(self, block):
+        """
+        Returns the next block.shape[axis] output samples,
+        which has to be a multiple of B.
+        """
+        block = np.moveaxis(np.asarray(block), self.axis, -1)
+        lead = block.shape[:-1]
+        Nb = block.shape[-1]
+        B, P = self.B, self.P
+        if Nb % B:
+            raise ValueError(f'block length {Nb} is not a multiple of {B}')
+
+        frame, fdl = self._state(block)
+        y = np.empty(lead + (Nb,), dtype=self.dtype)
+
+        for start in range(0, Nb, B):
+            frame[..., 0:B] = frame[..., B:2 * B]
+            frame[..., B:2 * B] = block[..., start : start + B]
+            w = self.frames % P
+            fdl[w] = fdl[w + P] = fft_forward(frame, 2 * B, self.real)
+            # newest spectrum with 1st partition, oldest with the last
+            Y = np.einsum('p...k,pk->...k', fdl[w + P : w : -1], self.H)
+            y[..., start : start + B] = fft_inverse(Y, 2 * B, self.real)[..., B:2 * B]
+            self.frames += 1
+
+        return np.moveaxis(y, -1, self.axis)
+
+    def flush(self):
+        """
+        Returns the last Nh-1 output samples and resets the state.
+        """
+        lead = () if self._frame is None else self._frame.shape[:-1]
+        n_tail = -(-(self.Nh - 1) // self.B) * self.B
+        tail = np.zeros(lead + (n_tail,), dtype=self.dtype)
+        y = self.process(np.moveaxis(tail, -1, self.axis))
+        y = np.moveaxis(y, self.axis, -1)[..., 0 : self.Nh - 1]
+        self.reset()
+        return np.moveaxis(y, -1, self.axis)
+
+    def reset(self):
+        """
+        Clears the input history & the delay line.
+        """
+        self._frame = None
+        self._fdl = None
+        self.frames = 0
+        if self._dtype is None:
+            self.dtype = None
+
+
+def conv_partitioned(h, x, B, axis=-1):
+    """
+    Computes response of a system (h) for a long input
+    sequence (x) using uniformly partitioned convolution
+    with blocks of B samples.
+
+    return:     y(n), x.shape[axis] + len(h) - 1 samples along axis
+    """
+    h = np.asarray(h)
+    x = np.moveaxis(np.asarray(x), axis, -1)
+    Nx = x.shape[-1]
+    conv = PartitionedConvolver(h, B, dtype=np.result_type(x, h, float))
+    x2 = np.zeros(x.shape[:-1] + (-(-Nx // B) * B,), dtype=conv.dtype)
+    x2[..., 0:Nx] = x
+    y = np.concatenate((conv.process(x2), conv.flush()), axis=-1)
+    return np.moveaxis(y[..., 0 : Nx + conv.Nh - 1], -1, axis)
+
+
+def conv_overlap_save_memmap(h, x, y, N1, chunk=pow(2,18), dtype=None, channels=1):
+    """
+    Computes response of a system (h) for an input sequence
+    larger than memory, streaming overlap & save (N1) blocks
+    of `chunk` samples from disk to disk.
+
+    x & y are either np.memmap arrays with time along axis 0,
+    or paths of raw binary files holding (N, channels) samples
+    of dtype. Files are read & written with plain file I/O, so
+    the working set stays at a few chunks however long x is.
+
+    arg:    h           impulse response of the system
+    arg:    x           input memmap or file path
+    arg:    y           output memmap or file path, len(x) + len(h) - 1 samples
+    arg:    N1          new samples per FFT frame
+    arg:    chunk       samples read from disk at a time
+    arg:    dtype       sample type of files, float64 by default
+    arg:    channels    interleaved channels in the files
+
+    return:     y as np.memmap
+    """
+    h = np.asarray(h)
+    Nh = len(h)
+
+    if isinstance(x, np.ndarray):
+        x_file = None
+        x_dtype = x.dtype
+        Nx = x.shape[0]
+        lead = x.shape[1:]
+    else:
+        x_file = open(x, 'rb')
+        x_dtype = np.dtype(dtype or np.float64)
+        lead = (channels,) if channels > 1 else ()
+        Nx = os.path.getsize(x) // (x_dtype.itemsize * channels)
+
+    conv = BlockConvolver(h, N1, dtype=np.result_type(x_dtype, h, float), axis=0)
+    if isinstance(y, np.ndarray):
+        y_file = None
+        if y.shape != (Nx + Nh - 1,) + lead:
+            raise ValueError(f'y has shape {y.shape}, expected {(Nx + Nh - 1,) + lead}')
+    else:
+        y_file = open(y, 'wb')
+        y_dtype = np.dtype(dtype or conv.dtype)
+
+    def write(start, block):
+        if y_file is None:
+            y[start : start + len(block)] = block
+        else:
+            block.astype(y_dtype, copy=False).tofile(y_file)
+
+    try:
+        for start in range(0, Nx, chunk):
+            n = min(chunk, Nx - start)
+            if x_file is None:
+                block = np.asarray(x[start : start + n])
+            else:
+                block = np.fromfile(x_file, dtype=x_dtype, count=n * max(channels, 1))
+                block = np.reshape(block, (n,) + lead)
+            write(start, conv.process(block))
+        if Nx == 0:  # flush() of an unused convolver has no channels
+            conv.process(np.zeros((0,) + lead))
+        write(Nx, conv.flush())
+    finally:
+        if x_file is not None:
+            x_file.close()
+        if y_file is not None:
+            y_file.close()
+
+    if y_file is None:
+        if isinstance(y, np.memmap):
+            y.flush()
+        return y
+    return np.memmap(y, dtype=y_dtype, mode='r', shape=(Nx + Nh - 1,) + lead)
+
+
 def main():
     ### sequences
     x = np.linspace(1, 14, 14)
@@ -91,6 +394,17 @@ def main():
             f'with values: {y_OS[WrongResult_Loc]}')
     print(f'Diff in results = {Diff}')
 
+    ### streaming overlap and save, block by block
+    conv = BlockConvolver(h, N1 - Nh + 1)
+    y_blocks = [conv.process(x[cnt : min(cnt + 5, Nx)])
+                for cnt in range(0, Nx, 5)]
+    y_blocks.append(conv.flush())
+    y_stream = np.concatenate(y_blocks)
+    Diff = np.sum(np.abs(y_linear - y_stream))
+
+    print(f'y_block_convolver:\n{y_stream}')
+    print(f'Diff in results = {Diff}')
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,32 @@
+# scaling of parallel overlap & add from 1 to all cores
+import os
+import numpy as np
+import time
+
+from conv_overlap_add import conv_overlap_add_fft, conv_overlap_add_parallel
+
+
+def main():
+    Nx = pow(2, 24)     # ~46 hours of one MIT-BIH lead
+    Nh = 255
+    N1 = 1794           # N_FFT = 2048
+    x = np.random.normal(0, 1, Nx)
+    h = np.random.normal(0, 1, Nh)
+
+    t1 = time.perf_counter()
+    y_serial = conv_overlap_add_fft(h, x, N1)
+    elapsed1 = time.perf_counter() - t1
+    print(f'Nx = {Nx}, Nh = {Nh}, N1 = {N1}, cores = {os.cpu_count()}')
+    print(f'serial: {elapsed1:.3f} sec., {Nx / elapsed1:.3e} samples/s')
+
+    print(f'{"jobs":>5} {"time (s)":>9} {"samples/s":>11} {"speedup":>8} {"bit-exact":>10}')
+    for n_jobs in range(1, os.cpu_count() + 1):
+        t1 = time.perf_counter()
+        y = conv_overlap_add_parallel(h, x, N1, n_jobs=n_jobs)
+        elapsed = time.perf_counter() - t1
+        print(f'{n_jobs:>5} {elapsed:>9.3f} {Nx / elapsed:>11.3e} '
+                f'{elapsed1 / elapsed:>8.2f} {str(np.array_equal(y, y_serial)):>10}')
+
+
+if __name__ == '__main__':
+    main()
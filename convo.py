@@ -13,18 +13,19 @@ print(f'h(n) = {h}')
 print(f'Y_linear(n) = {y_linear}')
 
 # Circular convolution wrong
-X = np.fft.fft(x)
-H = np.fft.fft(h)
+# x & h are real, rfft keeps only the non-negative half of the spectrum
+X = np.fft.rfft(x)
+H = np.fft.rfft(h)
 y_circular_wrong = np.multiply(X, H)
-y_circular_wrong = np.fft.ifft(y_circular_wrong)
-print(f'Y_circular_wrong(n) = {y_circular_wrong.real}')
+y_circular_wrong = np.fft.irfft(y_circular_wrong, len_x)
+print(f'Y_circular_wrong(n) = {y_circular_wrong}')
 
 # Circular convolution with zero padding
 N = len_x + len_h - 1
-X = np.fft.fft(x, N) # if len(x) < N, zero pads the sequence
-H = np.fft.fft(h, N)
+X = np.fft.rfft(x, N) # if len(x) < N, zero pads the sequence
+H = np.fft.rfft(h, N)
 y_circular_correct = np.multiply(X, H)
-y_circular_correct = np.fft.ifft(y_circular_correct)
-print(f'y_circular_correct(n) = {y_circular_correct.real}')
+y_circular_correct = np.fft.irfft(y_circular_correct, N)
+print(f'y_circular_correct(n) = {y_circular_correct}')
 
 #freq = np.fft.fftfreq(t.shape[-1])
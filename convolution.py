@@ -0,0 +1,288 @@
+# Linear convolution with automatic choice of method
+import json
+import os
+import platform
+import time
+import numpy as np
+
+from conv_overlap_add import conv_overlap_add_fft
+from conv_overlap_save import BlockConvolver
+from fftutils import next_fast_len, is_real, fft_forward, fft_inverse, filter_spectrum
+
+METHODS = ('direct', 'fft', 'overlap_add', 'overlap_save')
+MODEL_VERSION = 3  # bump when an engine or _features() changes
+CALIBRATION_FILE = os.environ.get(
+    'DSP_CONV_CALIBRATION',
+    os.path.join(os.path.expanduser('~'), '.cache', 'dsp-using-python',
+                 'conv_calibration.json'))
+
+_calibration = None
+
+
+def conv_fft(x: np.array, h: np.array, axis: int = -1) -> np.array:
+    """
+    Computes linear convolution of x & h using an FFT
+    zero-padded to the next 5-smooth length, real-input
+    transforms are used for real data. x may be N-D
+    with time along axis, h is 1-D.
+    """
+    x = np.moveaxis(np.asarray(x), axis, -1)
+    h = np.asarray(h)
+    N = x.shape[-1] + len(h) - 1
+    N2 = next_fast_len(N)
+    real = is_real(x, h)
+    y = fft_inverse(fft_forward(x, N2, real) * filter_spectrum(h, N2, real), N2, real)
+    return np.moveaxis(y[..., 0:N], -1, axis)
+
+
+def block_size(Nh: int) -> tuple[int, int]:
+    """
+    Returns block length N1 & FFT length for block
+    convolution with a filter of Nh taps.
+    """
+    # FFT of 8 filter lengths keeps the per-block overhead low
+    N_FFT = max(next_fast_len(8 * Nh), 64)
+    return N_FFT - Nh + 1, N_FFT
+
+
+def _conv_direct(x, h, axis):
+    if x.ndim == 1:
+        return np.convolve(x, h)
+    return np.apply_along_axis(np.convolve, axis, x, h)
+
+
+def _conv_overlap_add(x, h, axis):
+    N1, _ = block_size(len(h))
+    return conv_overlap_add_fft(h, x, N1, axis=axis)
+
+
+def _conv_overlap_save(x, h, axis):
+    N1, _ = block_size(len(h))
+    conv = BlockConvolver(h, N1, dtype=np.result_type(x, h, float), axis=axis)
+    return np.concatenate((conv.process(x), conv.flush()), axis=axis)
+
+
+_ENGINES = {
+    'direct': _conv_direct,
+    'fft': conv_fft,
+    'overlap_add': _conv_overlap_add,
+    'overlap_save': _conv_overlap_save,
+}
+
+
+def _features(method: str, Nx: int, Nh: int, n_ch: int = 1) -> np.array:
+    """
+    Returns terms of the cost model of a method, its
+    run time is modelled as a dot product with them.
+    n_ch channels of Nx samples share one filter.
+    """
+    if method == 'direct':
+        # one np.convolve call per channel
+        return np.array([n_ch, n_ch * Nx * Nh])
+
+    if method == 'fft':
+        N = next_fast_len(Nx + Nh - 1)
+        return np.array([1.0, n_ch * N * np.log2(N)])
+
+    N1, N_FFT = block_size(Nh)
+    n_blocks = -(-Nx // N1)
+    if method == 'overlap_add':
+        return np.array([1.0, n_ch * n_blocks * N_FFT * np.log2(N_FFT)])
+
+    # overlap & save also pays python overhead per frame
+    n_frames = -(-(Nx + Nh - 1) // N1)
+    return np.array([1.0, n_ch * n_frames * N_FFT * np.log2(N_FFT), n_frames])
+
+
+def _dtype_kind(x, h) -> str:
+    return 'complex' if (np.iscomplexobj(x) or np.iscomplexobj(h)) else 'real'
+
+
+def _best_time(func, *args, repeats: int = 3) -> float:
+    func(*args)  # warm up
+    elapsed = []
+    for _ in range(repeats):
+        t1 = time.perf_counter()
+        func(*args)
+        elapsed.append(time.perf_counter() - t1)
+    return min(elapsed)
+
+
+def calibrate(save_file: str = CALIBRATION_FILE) -> dict:
+    """
+    Measures every method on a grid of lengths and fits
+    the coefficients of its cost model for this machine.
+    The table is written to save_file (if given) and used
+    by convolve(method='auto') from then on.
+    """
+    global _calibration
+    rng = np.random.default_rng(0)
+    grid = [(Nx, Nh) for Nx in (pow(2,10), pow(2,13), pow(2,16))
+                     for Nh in (4, 32, 256, 2048) if Nh <= Nx]
+    # long filters & signals, so choose_method() does not extrapolate
+    # the FFT methods there; direct cost is exactly Nx Nh and would
+    # take seconds at these sizes
+    large = [(pow(2,17), 8192), (pow(2,17), pow(2,14)), (pow(2,18), pow(2,14))]
+
+    table = {}
+    for kind in ('real', 'complex'):
+        table[kind] = {}
+        for method in METHODS:
+            A, t = [], []
+            for Nx, Nh in grid + (large if method != 'direct' else []):
+                x = rng.normal(0, 1, Nx)
+                h = rng.normal(0, 1, Nh)
+                if kind == 'complex':
+                    x = x + 1j * rng.normal(0, 1, Nx)
+                A.append(_features(method, Nx, Nh))
+                t.append(_best_time(_ENGINES[method], x, h, -1))
+            # fit relative error, timings span several decades
+            A = np.array(A) / np.array(t)[:, None]
+            coeffs = np.linalg.lstsq(A, np.ones(len(t)), rcond=None)[0]
+            # a negative cost term is a fitting artifact
+            table[kind][method] = np.maximum(coeffs, 0).tolist()
+
+    _calibration = {
+        'version': MODEL_VERSION,
+        'machine': platform.node(),
+        'numpy': np.__version__,
+        'coeffs': table,
+    }
+
+    if save_file:
+        if os.path.dirname(save_file):
+            os.makedirs(os.path.dirname(save_file), exist_ok=True)
+        with open(save_file, 'w') as file:
+            json.dump(_calibration, file, indent=2)
+
+    return _calibration
+
+
+def load_calibration(save_file: str = CALIBRATION_FILE) -> dict:
+    """
+    Returns the calibration table of this machine,
+    it is measured & saved on first use.
+    """
+    global _calibration
+    if _calibration is None and os.path.exists(save_file):
+        with open(save_file) as file:
+            table = json.load(file)
+        if (table.get('version') == MODEL_VERSION
+                and table.get('machine') == platform.node()
+                and table.get('numpy') == np.__version__):
+            _calibration = table
+
+    if _calibration is None:
+        _calibration = calibrate(save_file)
+
+    return _calibration
+
+
+def predict_costs(Nx: int, Nh: int, kind: str = 'real', n_ch: int = 1) -> dict:
+    """
+    Returns predicted run time (sec.) of every method.
+    """
+    coeffs = load_calibration()['coeffs'][kind]
+    return {method: float(np.dot(coeffs[method], _features(method, Nx, Nh, n_ch)))
+            for method in METHODS}
+
+
+def choose_method(Nx: int, Nh: int, kind: str = 'real', n_ch: int = 1) -> str:
+    """
+    Returns the method with the lowest predicted cost.
+    """
+    if min(Nx, Nh) < 2:
+        return 'direct'
+    costs = predict_costs(Nx, Nh, kind, n_ch)
+    if _few_blocks(Nx, Nh):
+        del costs['overlap_add'], costs['overlap_save']
+    return min(costs, key=costs.get)
+
+
+def _few_blocks(Nx: int, Nh: int) -> bool:
+    # with 2 blocks or less a block method transforms more points
+    # than one FFT of the whole sequence, the linear cost model
+    # underrates that for long filters
+    N1, _ = block_size(Nh)
+    return -(-Nx // N1) <= 2
+
+
+def _shape(x, h, axis):
+    """
+    Returns Nx, Nh & no. of channels of the convolution,
+    x & h are swapped when both are 1-D and h is longer.
+    """
+    if x.ndim == 1 and len(h) > len(x):
+        x, h = h, x
+    Nx = x.shape[axis]
+    n_ch = x.size // Nx if Nx else 1
+    return x, h, Nx, len(h), n_ch
+
+
+def explain_method(x, h, axis: int = -1) -> str:
+    """
+    Returns a report of why convolve(x, h) picks its method.
+    """
+    x, h, Nx, Nh, n_ch = _shape(np.asarray(x), np.asarray(h), axis)
+    kind = _dtype_kind(x, h)
+    method = choose_method(Nx, Nh, kind, n_ch)
+    costs = predict_costs(Nx, Nh, kind, n_ch)
+    table = load_calibration()
+
+    lines = [f'Nx = {Nx}, Nh = {Nh}, {n_ch} channel(s), {kind} data, '
+             f'calibrated on {table["machine"]} (numpy {table["numpy"]})']
+    for m in sorted(costs, key=costs.get):
+        mark = '*' if m == method else ' '
+        lines.append(f'{mark} {m:<13} {1e3 * costs[m]:10.3f} ms')
+    if min(Nx, Nh) < 2:
+        lines.append('single sample sequence, direct method is used')
+    elif _few_blocks(Nx, Nh):
+        lines.append('2 blocks or less, block methods are not considered')
+    return '\n'.join(lines)
+
+
+def convolve(x: np.array, h: np.array, method: str = 'auto', axis: int = -1) -> np.array:
+    """
+    Computes linear convolution of x & h, equal to np.convolve(x, h)
+    for every channel of x.
+
+    arg:    x       input sequence(s), N-D with time along axis
+    arg:    h       impulse response of the system, 1-D
+    arg:    method  'auto', 'direct', 'fft', 'overlap_add' or 'overlap_save'
+    arg:    axis    time axis of x
+
+    return:     y(n), x.shape[axis] + len(h) - 1 samples along axis
+    """
+    # block methods need the shorter sequence as filter
+    x, h, Nx, Nh, n_ch = _shape(np.asarray(x), np.asarray(h), axis)
+
+    if method == 'auto':
+        method = choose_method(Nx, Nh, _dtype_kind(x, h), n_ch)
+    elif method not in METHODS:
+        raise ValueError(f'unknown method: {method}')
+
+    return _ENGINES[method](x, h, axis)
+
+
+def main():
+    rng = np.random.default_rng()
+    for Nx, Nh in [(1000, 5), (pow(10,5), 31), (pow(10,5), pow(10,4)), (650000, 255)]:
+        x = rng.normal(0, 1, Nx)
+        h = rng.normal(0, 1, Nh)
+        print(explain_method(x, h))
+        y = convolve(x, h)
+        Diff = np.max(np.abs(y - np.convolve(x, h)))
+        print(f'max |y - y_linear| = {Diff:.3e}\n')
+
+    # 12-lead ECG record, leads in columns
+    x = rng.normal(0, 1, (5000, 12))
+    h = rng.normal(0, 1, 101)
+    print(explain_method(x, h, axis=0))
+    y = convolve(x, h, axis=0)
+    Diff = max(np.max(np.abs(y[:, cnt] - np.convolve(x[:, cnt], h)))
+               for cnt in range(x.shape[1]))
+    print(f'max |y - y_linear| = {Diff:.3e}')
+
+
+if __name__ == '__main__':
+    main()
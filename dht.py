@@ -1,56 +1,128 @@
 # Discrete Heartly Transform
 import numpy as np
-import matplotlib.pyplot as plt
 
-def dht(x: np.array):
+
+def dht(x: np.array, axis: int = -1, overwrite_x: bool = False) -> np.array:
+    """
+    Computes DHT of signal samples using a real-input FFT.
+
+    H(k) = Re X(k) - Im X(k) for the non-negative half of the
+    spectrum, the rest follows from X(N-k) = conj(X(k)), so no
+    full complex spectrum is ever allocated.
+
+    arg:    x           signal samples, N-D arrays are transformed along axis
+    arg:    axis        axis of the transform
+    arg:    overwrite_x write the result into x (float arrays only)
+
+    return:     H(k)
+    """
+    x = np.asarray(x)
+    if overwrite_x and x.dtype.kind != 'f':
+        raise ValueError('overwrite_x needs a float array')
+    x_t = np.moveaxis(x, axis, -1)
+    N = x_t.shape[-1]
+    M = N // 2 + 1
+    X = np.fft.rfft(x_t)
+
+    X_DHT = x_t if overwrite_x else np.empty(x_t.shape)
+    np.subtract(X.real, X.imag, out=X_DHT[..., 0:M])
+    # H(N-k) = Re X(k) + Im X(k)
+    np.add(X.real[..., 1 : (N + 1) // 2], X.imag[..., 1 : (N + 1) // 2],
+           out=X_DHT[..., N - 1 : N // 2 : -1])
+    return x if overwrite_x else np.moveaxis(X_DHT, -1, axis)
+
+
+def idht(X: np.array, axis: int = -1, overwrite_x: bool = False) -> np.array:
+    """
+    Computes IDHT of a signal's spectrum, the DHT is its
+    own inverse up to a factor of 1/N.
+    """
+    x = dht(X, axis=axis, overwrite_x=overwrite_x)
+    x *= 1 / np.shape(X)[axis]
+    return x
+
+
+def dht_complex(x: np.array) -> np.array:
+    """
+    Computes DHT of signal samples from a complex FFT.
+    """
     X = np.fft.fft(x)
     X = X.real - X.imag
     return X
 
-def idht(X: np.array):
-    n = len(X)
-    x = dht(X)
-    x = 1/n * x
-    return x
 
+def dht_direct(x: np.array) -> np.array:
+    """
+    Computes DHT of signal samples from its definition.
+    """
+    N = len(x)
+    X_DHT = np.zeros(N)
+    k = 0
+    while k < N:
+        tmp1 = 0
+        n = 0
+        while n < N:
+            term1 = 2 * np.pi * n * k / N
+            tmp2 = x[n]*(np.cos(term1) + np.sin(term1))
+            tmp1 += tmp2
+            n += 1
+        X_DHT[k] = tmp1
+        k += 1
+
+    return X_DHT
 
-Fs = 200
-Ts = 1 / Fs
-Duration = 2
-N = Duration * Fs
-t = np.linspace(start=0.0, stop=Duration-Ts, num=N)
-x = np.cos(2*np.pi*t)
-N = len(x)
 
-# DHT
-X_DHT = np.zeros(N)
-k = 0
-while k < N:
-    tmp1 = 0
+def idht_direct(X_DHT: np.array) -> np.array:
+    """
+    Computes IDHT of a signal's spectrum from its definition.
+    """
+    N = len(X_DHT)
+    x2 = np.zeros(N)
     n = 0
     while n < N:
-        term1 = 2 * np.pi * n * k / N
-        tmp2 = x[n]*(np.cos(term1) + np.sin(term1))
-        tmp1 += tmp2
+        tmp1 = 0
+        k = 0
+        while k < N:
+            term1 = 2 * np.pi * n * k / N
+            tmp2 = X_DHT[k]*(np.cos(term1) + np.sin(term1))
+            tmp1 += tmp2
+            k += 1
+        x2[n] = tmp1 / N
         n += 1
-    X_DHT[k] = tmp1
-    k += 1
-
-# IDCT
-x2 = np.zeros(N)
-n = 0
-while n < N:
-    tmp1 = 0
-    k = 0
-    while k < N:
-        term1 = 2 * np.pi * n * k / N
-        tmp2 = X_DHT[k]*(np.cos(term1) + np.sin(term1))
-        tmp1 += tmp2
-        k += 1
-    x2[n] = tmp1 / N
-    n += 1
 
-X_DHT3 = dht(x)
-x3 = idht(X_DHT3)
+    return x2
+
+
+def main():
+    Fs = 200
+    Ts = 1 / Fs
+    Duration = 2
+    N = Duration * Fs
+    t = np.linspace(start=0.0, stop=Duration-Ts, num=N)
+    x = np.cos(2*np.pi*t)
+    N = len(x)
+
+    # DHT
+    X_DHT = dht_direct(x)
+
+    # IDHT
+    x2 = idht_direct(X_DHT)
+
+    X_DHT3 = dht(x)
+    x3 = idht(X_DHT3)
+
+    print(f'max |X_direct - X_fht| = {np.max(np.abs(X_DHT - X_DHT3)):.3e}')
+    print(f'max |X_complex - X_fht| = {np.max(np.abs(dht_complex(x) - X_DHT3)):.3e}')
+    print(f'max |x - x2| = {np.max(np.abs(x - x2)):.3e}')
+    print(f'max |x - x3| = {np.max(np.abs(x - x3)):.3e}')
+
+    # in place, batch of 12 leads
+    x4 = np.random.normal(0, 1, (5000, 12))
+    x5 = x4.copy()
+    dht(x5, axis=0, overwrite_x=True)
+    idht(x5, axis=0, overwrite_x=True)
+    print(f'max |x - IDHT(DHT(x))| in place = {np.max(np.abs(x4 - x5)):.3e}')
 
 
+if __name__ == '__main__':
+    main()
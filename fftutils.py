@@ -0,0 +1,150 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+def next_fast_len(N: int) -> int:
+    """
+    Returns the smallest 5-smooth (2^a 3^b 5^c) integer >= N,
+    FFT of such a length is nearly as fast as of a power of 2
+    but needs much less zero padding.
+    """
+    N = int(N)
+    if N <= 6:
+        return max(N, 1)
+
+    best = np.power(2, np.ceil(np.log2(N))).astype(int)
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            # smallest power of 2 taking p35 up to N
+            quotient = -(-N // p35)
+            p2 = 1 << (quotient - 1).bit_length()
+            best = min(best, p2 * p35)
+            p35 *= 3
+        p5 *= 5
+    return int(best)
+
+
+def is_real(*arrays) -> bool:
+    """
+    True if none of the arrays holds complex values.
+    """
+    return not any(np.iscomplexobj(a) for a in arrays)
+
+
+def fft_forward(x: np.array, N: int, real: bool, axis: int = -1) -> np.array:
+    """
+    Computes N point spectrum of x, only the non-negative
+    half (N//2 + 1 points) for real data.
+    """
+    if real:
+        return np.fft.rfft(x, N, axis=axis)
+    return np.fft.fft(x, N, axis=axis)
+
+
+def fft_inverse(X: np.array, N: int, real: bool, axis: int = -1) -> np.array:
+    """
+    Inverse of fft_forward().
+    """
+    if real:
+        return np.fft.irfft(X, N, axis=axis)
+    return np.fft.ifft(X, N, axis=axis)
+
+
+class SpectrumCache:
+    """
+    Process-wide LRU cache of filter spectra.
+
+    Spectra are keyed by a hash of the coefficient bytes,
+    their dtype & shape, the FFT length and real/complex mode,
+    so one design reused across many records or calls is
+    transformed only once. Cached spectra are read-only.
+
+    arg:    max_bytes   bound on the total size of cached spectra
+    """
+
+    def __init__(self, max_bytes: int = 64 * pow(2,20)):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, h: np.array, N: int, real: bool, axis: int = -1) -> np.array:
+        """
+        Returns fft_forward(h, N, real, axis), from the cache if possible.
+        """
+        h = np.ascontiguousarray(h)
+        digest = hashlib.blake2b(h.tobytes(), digest_size=16).digest()
+        key = (digest, h.dtype.str, h.shape, int(N), bool(real), axis)
+
+        with self._lock:
+            H = self._items.get(key)
+            if H is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return H
+            self.misses += 1
+
+        H = fft_forward(h, N, real, axis=axis)
+        H.setflags(write=False)
+
+        with self._lock:
+            if key not in self._items and H.nbytes <= self.max_bytes:
+                self._items[key] = H
+                self.nbytes += H.nbytes
+                self._evict()
+        return H
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes:
+            _, H = self._items.popitem(last=False)
+            self.nbytes -= H.nbytes
+            self.evictions += 1
+
+    def resize(self, max_bytes: int):
+        """
+        Changes the size bound, evicting spectra if needed.
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        """
+        Drops all spectra and zeroes the counters.
+        """
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss/eviction counters & current size.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._items),
+                'nbytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+spectrum_cache = SpectrumCache()
+
+
+def filter_spectrum(h: np.array, N: int, real: bool, axis: int = -1) -> np.array:
+    """
+    Returns N point spectrum of filter coefficients h
+    through the process-wide spectrum_cache.
+    """
+    return spectrum_cache.get(h, N, real, axis)
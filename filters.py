@@ -0,0 +1,262 @@
+import warnings
+from functools import cached_property
+import numpy as np
+from scipy import signal
+
+import lti
+
+
+class Filter:
+    """
+    An LTI filter design, num/den or second order sections and
+    its sampling rate, with its analysis computed on first use
+    and kept: frequency & phase response, band edges, poles,
+    zeros and group delay. Coefficients are read-only so the
+    cached results stay valid, apply() & stream() filter data
+    with the same object for any number of records.
+
+    arg:    num     coeffs of numerator polynomial
+    arg:    den     coeffs of denomenator polynomial
+    arg:    Fs      sampling freq
+    arg:    sos     second order sections (sections, 6) instead of num/den
+    arg:    band    'lpf', 'hpf', 'bpf' or 'bsf', guessed from the
+                    response at 0 and Fs/2 if not given
+    arg:    N_FFT   resolution/points of the responses over 0..Fs
+    """
+
+    def __init__(self, num=None, den=1.0, Fs: float = 1.0, sos=None,
+                 band: str = None, N_FFT: int = 512):
+        if (num is None) == (sos is None):
+            raise ValueError('give either num & den or sos')
+        if sos is not None:
+            self.sos = self._frozen(np.atleast_2d(sos))
+            num, den = lti.sos2tf(self.sos)
+        else:
+            self.sos = None
+        self.num = self._frozen(np.atleast_1d(num))
+        self.den = self._frozen(np.atleast_1d(den))
+        self.Fs = Fs
+        self.N_FFT = N_FFT
+        if band is not None:
+            self.band = band
+
+    @staticmethod
+    def _frozen(a: np.array) -> np.array:
+        a = np.array(a, dtype=np.result_type(a, float))
+        a.setflags(write=False)
+        return a
+
+    @cached_property
+    def is_fir(self) -> bool:
+        return self.sos is None and not np.any(self.den[1:])
+
+    @cached_property
+    def symmetry(self) -> int:
+        """
+        1 for symmetric, -1 for antisymmetric FIR taps, both of
+        linear phase, 0 otherwise, see lti.fir_symmetry().
+        """
+        return lti.fir_symmetry(self.num) if self.is_fir else 0
+
+    ### responses
+
+    @cached_property
+    def f(self) -> np.array:
+        """
+        Frequencies of the FFT bins over 0..Fs.
+        """
+        return np.arange(self.N_FFT) * self.Fs / self.N_FFT
+
+    @cached_property
+    def _response(self) -> tuple:
+        if self.sos is not None:
+            H, H_phi = lti.sos_response_fft(self.sos, self.N_FFT)
+        else:
+            H, H_phi = lti.system_response_fft(self.num, self.den, self.N_FFT)
+        H.setflags(write=False)
+        H_phi.setflags(write=False)
+        return H, H_phi
+
+    @property
+    def H(self) -> np.array:
+        """
+        Frequency response H(k) at f.
+        """
+        return self._response[0]
+
+    @property
+    def H_phi(self) -> np.array:
+        """
+        Phase response (degrees) at f.
+        """
+        return self._response[1]
+
+    @cached_property
+    def H_abs(self) -> np.array:
+        H_abs = np.absolute(self.H)
+        H_abs.setflags(write=False)
+        return H_abs
+
+    @cached_property
+    def amplitude(self) -> np.array:
+        """
+        Real zero-phase amplitude response A at f of a linear phase
+        FIR, |A| = H_abs, see lti.amplitude_response().
+        """
+        if not self.symmetry:
+            raise ValueError('not a linear phase FIR')
+        A = lti.amplitude_response(self.num / self.den[0], self.N_FFT, self.Fs)
+        A.setflags(write=False)
+        return A
+
+    @cached_property
+    def group_delay(self) -> np.array:
+        """
+        Group delay (samples) at f, summed over sections. (M-1)/2
+        everywhere for a linear phase FIR of M taps.
+        """
+        if self.symmetry:
+            gd = np.full(self.N_FFT, (len(self.num) - 1) / 2)
+            gd.setflags(write=False)
+            return gd
+        if self.sos is not None:
+            sections = [(s[0:3], s[3:6]) for s in self.sos]
+        else:
+            sections = [(self.num, self.den)]
+        gd = np.zeros(self.N_FFT)
+        with warnings.catch_warnings():
+            # singular at zeros on the unit circle, set to 0 there
+            warnings.simplefilter('ignore')
+            for num, den in sections:
+                gd += signal.group_delay((num, den), w=self.f, fs=self.Fs)[1]
+        gd.setflags(write=False)
+        return gd
+
+    @cached_property
+    def zeros(self) -> np.array:
+        if self.sos is not None:
+            return np.concatenate([np.roots(s[0:3]) for s in self.sos]).astype(complex)
+        return np.roots(self.num).astype(complex)
+
+    @cached_property
+    def poles(self) -> np.array:
+        if self.sos is not None:
+            return np.concatenate([np.roots(s[3:6]) for s in self.sos]).astype(complex)
+        return np.roots(self.den).astype(complex)
+
+    ### band edges
+
+    @cached_property
+    def band(self) -> str:
+        H_abs = self.H_abs[0 : self.N_FFT // 2 + 1]
+        level = np.max(H_abs) / np.sqrt(2)
+        low, high = H_abs[0] > level, H_abs[-1] > level
+        return {(True, False): 'lpf', (False, True): 'hpf',
+                (False, False): 'bpf', (True, True): 'bsf'}[(low, high)]
+
+    def _edges(self, level: float, edges: np.array) -> np.array:
+        # zoom into the bins around each edge found on the grid
+        df = self.Fs / self.N_FFT
+        if self.sos is not None:
+            # per section, the expanded polynomials are ill-conditioned
+            def refine(f1, f2):
+                return lti.refine_edge_sos(self.sos, f1, f2, level, self.Fs)
+        else:
+            def refine(f1, f2):
+                return lti.refine_edge(self.num, self.den, f1, f2, level, self.Fs)
+        fine = np.array([np.nan if np.isnan(fe) else refine(fe - 2*df, fe + 2*df)
+                         for fe in np.atleast_1d(edges)])
+        return fine if np.ndim(edges) else fine[0]
+
+    @cached_property
+    def cutoff(self):
+        """
+        Cut-off frequency, a pair for a BPF & BSF, -3 dB from the
+        maximum, refined on zoomed responses. NaN if not found.
+        """
+        n_half = self.N_FFT // 2 + 1
+        level = np.max(self.H_abs) / np.sqrt(2)
+        edges = lti.find_edges(self.f[0:n_half], self.H_abs[0:n_half], level, self.band)
+        return self._edges(level, edges)
+
+    def stopband(self, As: float):
+        """
+        Stopband edge frequency, a pair for a BPF & BSF, where
+        the response falls to As (dB). Kept per As.
+        """
+        cache = self.__dict__.setdefault('_stopband', {})
+        if As not in cache:
+            n_half = self.N_FFT // 2 + 1
+            level = 10**(-As/20)
+            edges = lti.find_edges(self.f[0:n_half], self.H_abs[0:n_half], level, self.band)
+            cache[As] = self._edges(level, edges)
+        return cache[As]
+
+    ### data
+
+    def apply(self, x: np.array, axis: int = -1) -> np.array:
+        """
+        Filters a whole sequence, all channels along axis at once.
+        FIR filters use convolution.convolve() with its fastest
+        method, IIR filters lfilter or sosfilt.
+
+        return:     y(n), same shape as x
+        """
+        if self.sos is not None:
+            return signal.sosfilt(self.sos, x, axis=axis)
+        if self.is_fir:
+            from convolution import convolve
+
+            x = np.moveaxis(np.asarray(x), axis, -1)
+            y = convolve(x, self.num / self.den[0])[..., 0 : x.shape[-1]]
+            return np.moveaxis(y, -1, axis)
+        return signal.lfilter(self.num, self.den, x, axis=axis)
+
+    def stream(self, axis: int = -1, **kwargs):
+        """
+        Returns a streaming filter of this design for block by
+        block processing, see stream_filter.
+        """
+        from stream_filter import StreamFilter, SOSFilter
+
+        if self.sos is not None:
+            return SOSFilter(self.sos, axis=axis, **kwargs)
+        return StreamFilter(self.num, self.den, axis=axis, **kwargs)
+
+    ### plots
+
+    def plot_response(self, title: str, save_file: str = None, H_phi: np.array = None,
+                      hspace: float = 0.3) -> None:
+        """
+        Plots amplitude & phase response over 0..Fs.
+
+        arg:    H_phi   phase to plot instead of self.H_phi
+        """
+        import matplotlib.pyplot as plt
+
+        plt.figure(1)
+        plt.clf()
+        plt.subplot(2,1,1)
+        plt.plot(self.f, self.H_abs, 'b')
+        plt.grid()
+        plt.xlabel('f (Hz)')
+        plt.ylabel('$|H(k)|$')
+
+        plt.subplot(2,1,2)
+        plt.plot(self.f, self.H_phi if H_phi is None else H_phi, 'b')
+        plt.grid()
+        plt.xlabel('f (Hz)')
+        plt.ylabel(r'$\Phi^{\circ}$')
+
+        plt.suptitle(title)
+        plt.subplots_adjust(hspace=hspace)
+        if save_file:
+            plt.savefig(save_file)
+
+    def pz_plot(self, title: str = 'Pole-Zero Plot', show: bool = False,
+                save_file: str = None) -> None:
+        """
+        Plots poles & zeros, per section for second order
+        sections, see lti.plot_pz().
+        """
+        lti.plot_pz(self.zeros, self.poles, title=title, show=show, save_file=save_file)
@@ -0,0 +1,178 @@
+"""
+ Windowed FIR design search
+
+ Sweeps tap counts and windows of signal.firwin for a spec
+ (band edges, As, Fs, max. taps), scores all responses at once
+ with the batch edge finders and returns the cheapest design,
+ the one with the fewest taps, that meets the spec.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy import signal
+
+from fftutils import fft_forward
+from lti import find_cutoff, find_stopband
+
+WINDOWS = ('boxcar', 'bartlett', 'hann', 'hamming', 'blackman',
+           ('kaiser', 4.0), ('kaiser', 6.0), ('kaiser', 8.0))
+
+PASS_ZERO = {'lpf': True, 'hpf': False, 'bpf': False, 'bsf': True}
+
+
+def _stop_mask(f: np.array, band: str, f_stop) -> np.array:
+    if band == 'lpf':
+        return f >= f_stop
+    if band == 'hpf':
+        return f <= f_stop
+    if band == 'bpf':
+        return (f <= f_stop[0]) | (f >= f_stop[1])
+    return (f >= f_stop[0]) & (f <= f_stop[1])
+
+
+def _pass_ok(fc: np.array, band: str, f_pass) -> np.array:
+    # -3 dB edges must not cut into the passband, NaN fails
+    if band == 'lpf':
+        return fc >= f_pass
+    if band == 'hpf':
+        return fc <= f_pass
+    if band == 'bpf':
+        return (fc[..., 0] <= f_pass[0]) & (fc[..., 1] >= f_pass[1])
+    return (fc[..., 0] >= f_pass[0]) & (fc[..., 1] <= f_pass[1])
+
+
+def evaluate(designs: list, band: str, f_pass, f_stop, As: float, Fs: float,
+             N: int = 4096) -> dict:
+    """
+    Designs & scores a batch of windowed FIR filters. Responses
+    of all designs are one rfft of the zero padded coefficient
+    stack, edges come from lti.find_cutoff() & find_stopband().
+
+    arg:    designs     list of (taps, window)
+    arg:    band        'lpf', 'hpf', 'bpf' or 'bsf'
+    arg:    f_pass      passband edge(s) (Hz), a pair for 'bpf' & 'bsf'
+    arg:    f_stop      stopband edge(s) (Hz)
+    arg:    As          min. stopband attenuation (dB)
+    arg:    Fs          sampling freq
+    arg:    N           points of the responses from 0 to Fs/2
+
+    return:     dict of arrays, one entry per design: 'ok', 'fc',
+                'fs' (measured edges) and 'As' (attenuation, dB)
+    """
+    cutoff = (np.asarray(f_pass) + np.asarray(f_stop)) / 2
+    taps = [d[0] for d in designs]
+    num = np.zeros((len(designs), max(taps)))
+    for cnt, (n_taps, window) in enumerate(designs):
+        num[cnt, 0:n_taps] = signal.firwin(n_taps, cutoff, window=window,
+                                           pass_zero=PASS_ZERO[band], fs=Fs)
+
+    f = np.linspace(0, Fs / 2, N)
+    H_abs = np.abs(fft_forward(num, 2 * (N - 1), real=True))
+    stop = _stop_mask(f, band, f_stop)
+    with np.errstate(divide='ignore'):
+        att = -20 * np.log10(np.max(H_abs[:, stop], axis=-1))
+    fc = find_cutoff(f, H_abs, band)
+    return {
+        'ok': (att >= As) & _pass_ok(fc, band, f_pass),
+        'fc': fc,
+        'fs': find_stopband(f, H_abs, As, band),
+        'As': att,
+    }
+
+
+def _evaluate_chunk(args):
+    return evaluate(*args)
+
+
+def design_search(band: str, f_pass, f_stop, As: float, Fs: float,
+                  max_taps: int = 101, windows=WINDOWS, N: int = 4096,
+                  n_jobs: int = None, chunk: int = None) -> dict:
+    """
+    Returns the windowed FIR filter with the fewest taps meeting
+    the spec, the highest attenuation among equally long ones.
+    Odd tap counts from 3 to max_taps with all windows are
+    evaluated in chunks across a process pool.
+
+    arg:    n_jobs  no. of worker processes, all cores by default
+    arg:    chunk   designs per task, 4 tasks per worker by default
+
+    return:     dict of 'num', 'taps', 'window', 'fc', 'fs', 'As'
+                & 'evaluated', None if no design meets the spec
+    """
+    designs = [(n_taps, window) for n_taps in range(3, max_taps + 1, 2)
+               for window in windows]
+    n_jobs = n_jobs or os.cpu_count()
+    chunk = chunk or max(-(-len(designs) // (4 * n_jobs)), 1)
+    tasks = [(designs[cnt : cnt + chunk], band, f_pass, f_stop, As, Fs, N)
+             for cnt in range(0, len(designs), chunk)]
+
+    if n_jobs == 1 or len(tasks) == 1:
+        parts = list(map(_evaluate_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            parts = list(pool.map(_evaluate_chunk, tasks))
+    score = {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+    ok = np.nonzero(score['ok'])[0]
+    if len(ok) == 0:
+        return None
+    # designs are ordered by taps, the first ones meeting the spec are the cheapest
+    taps = np.array([d[0] for d in designs])
+    best = ok[taps[ok] == taps[ok[0]]]
+    best = best[np.argmax(score['As'][best])]
+    n_taps, window = designs[best]
+    cutoff = (np.asarray(f_pass) + np.asarray(f_stop)) / 2
+    return {
+        'num': signal.firwin(n_taps, cutoff, window=window,
+                             pass_zero=PASS_ZERO[band], fs=Fs),
+        'taps': n_taps,
+        'window': window,
+        'fc': score['fc'][best],
+        'fs': score['fs'][best],
+        'As': score['As'][best],
+        'evaluated': len(designs),
+    }
+
+
+def main():
+    ### specs of window_fir_{lpf,hpf,bpf,bsf}1.py
+    Fs = 8000
+    As = 40
+    specs = {
+        'lpf': (2000, 2800),
+        'hpf': (2000, 1200),
+        'bpf': ([2000, 3000], [1200, 3800]),
+        'bsf': ([1200, 3800], [2000, 3000]),
+    }
+    print(f'Fs = {Fs} Hz, As = {As} dB')
+    for band, (f_pass, f_stop) in specs.items():
+        t1 = time.perf_counter()
+        best = design_search(band, f_pass, f_stop, As, Fs, max_taps=101)
+        elapsed = time.perf_counter() - t1
+        print(f'{band}: pass {f_pass} Hz, stop {f_stop} Hz -> {best["taps"]} taps, '
+                f'{best["window"]}, fc = {np.round(best["fc"], 2)} Hz, '
+                f'fs = {np.round(best["fs"], 2)} Hz, As = {best["As"]:.1f} dB '
+                f'({best["evaluated"]} designs, {elapsed:.3f} sec.)')
+
+    ### scaling of a large sweep with the no. of workers
+    # a narrow transition needs long filters
+    args = ('lpf', 1000, 1100, 60, Fs)
+    Max_taps = 801
+    t1 = time.perf_counter()
+    best = design_search(*args, max_taps=Max_taps, N=8192, n_jobs=1)
+    elapsed1 = time.perf_counter() - t1
+    print(f'\nlpf: pass 1000 Hz, stop 1100 Hz, As = 60 dB -> {best["taps"]} taps, '
+            f'{best["window"]} ({best["evaluated"]} designs), cores = {os.cpu_count()}')
+    print(f'{"jobs":>5} {"time (s)":>9} {"designs/s":>10} {"speedup":>8}')
+    print(f'{"1":>5} {elapsed1:>9.3f} {best["evaluated"] / elapsed1:>10.1f} {1.0:>8.2f}')
+    for n_jobs in range(2, max(os.cpu_count(), 2) + 1):
+        t1 = time.perf_counter()
+        design_search(*args, max_taps=Max_taps, N=8192, n_jobs=n_jobs)
+        elapsed = time.perf_counter() - t1
+        print(f'{n_jobs:>5} {elapsed:>9.3f} {best["evaluated"] / elapsed:>10.1f} '
+                f'{elapsed1 / elapsed:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
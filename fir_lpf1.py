@@ -6,12 +6,11 @@
  gives a real zero at -1
  
  Fs = 1000 Hz
- fc = 250.48 Hz
+ fc = 250.00 Hz
 """
-import numpy as np
 import matplotlib.pyplot as plt
 
-from lti import system_response_fft, find_lpf_cutoff, pz_plot
+from filters import Filter
 
 
 def main():
@@ -25,41 +24,16 @@ def main():
     pz_fig_filename = 'fig/fir_lpf1_pzplot.png'
 
     ### H(k)
-    H1, H1_phi = system_response_fft(num, den, N_FFT)
-    H1_abs = np.absolute(H1)
-    f = np.linspace(0.0, Fs, N_FFT)
-    fc = find_lpf_cutoff(f, H1_abs)
+    lpf = Filter(num, den, Fs, band='lpf', N_FFT=N_FFT)
+    fc = lpf.cutoff
 
     print(f'fc = {fc:.2f} Hz')
 
     ### plot
-    # freq resp.
-    plt.figure(1)
-    plt.clf()
-    plt.subplot(2,1,1)
-    plt.plot(f, H1_abs, 'b')
-    plt.grid()
-    plt.xlabel('f (Hz)')
-    plt.ylabel('$|H(k)|$')
-    #plt.title('Amplitude Response $|H(k)|$')
+    lpf.plot_response(f'LPF with $f_c = ${fc:.2f} Hz', resp_fig_filename, hspace=0.5)
+    lpf.pz_plot(title='LPF Pole-Zero Plot', save_file=pz_fig_filename)
 
-    # phase resp.
-    plt.subplot(2,1,2)
-    plt.plot(f, H1_phi, 'b')
-    plt.grid()
-    plt.xlabel('f (Hz)')
-    plt.ylabel('$\Phi^{\circ}$')
-    #plt.title('Phase Response $\Phi(H(k))$')
-    
-    plt.suptitle(f'LPF with $f_c = ${fc:.2f} Hz')
-    plt.subplots_adjust(hspace=0.5)
-
-    plt.savefig(resp_fig_filename)
-
-    pz_plot(num, den, title='LPF Pole-Zero Plot')
-    plt.savefig(pz_fig_filename)
-    
-    plt.show()    
+    plt.show()
 
 
 if __name__ == '__main__':
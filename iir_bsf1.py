@@ -10,13 +10,13 @@
  - Fs = 1000 Hz
  - Zeros at z = {z = 0.6 - 0.8j, z = 0.6 + 0.8j}
  - Poles at z = {0.57 - 0.69649j, 0.57 + 0.69649j}
- fc1 = 133.07 Hz
- fc2 = 180.04 Hz
+ fc1 = 133.63 Hz
+ fc2 = 180.86 Hz
 """
 import numpy as np
 import matplotlib.pyplot as plt
 
-from lti import system_response_fft, find_bsf_cutoff, pz_plot
+from filters import Filter
 
 
 def main():
@@ -33,40 +33,14 @@ def main():
     pz_fig_filename = 'fig/iir_bsf1_pzplot.png'
 
     ### H(k)
-    H1, H1_phi = system_response_fft(num, den, N_FFT)
-    H1_abs = np.absolute(H1)
-    #H1_phi[0] = H1_phi[1]
-    f = np.linspace(0.0, Fs, N_FFT)
-    fc1, fc2 = find_bsf_cutoff(f, H1_abs)
+    bsf = Filter(num, den, Fs, band='bsf', N_FFT=N_FFT)
+    fc1, fc2 = bsf.cutoff
 
     print(f'fc1 = {fc1:.2f} Hz, fc2 = {fc2:.2f} Hz')
 
     ### plot
-    # freq resp.
-    plt.figure(1)
-    plt.clf()
-    plt.subplot(2,1,1)
-    plt.plot(f, H1_abs, 'b')
-    plt.grid()
-    plt.xlabel('f (Hz)')
-    plt.ylabel('$|H(k)|$')
-    #plt.title('Amplitude Response $|H(k)|$')
-
-    # phase resp.
-    plt.subplot(2,1,2)
-    plt.plot(f, H1_phi, 'b')
-    plt.grid()
-    plt.xlabel('f (Hz)')
-    plt.ylabel('$\Phi^{\circ}$')
-    #plt.title('Phase Response $\Phi(H(k))$')
-    
-    plt.suptitle(f'BPF with $f_c = (${fc1:.2f} Hz, {fc2:.2f} Hz$)$')
-    plt.subplots_adjust(hspace=0.3)
-
-    plt.savefig(resp_fig_filename)
-
-    pz_plot(num, den, title='BPF Pole-Zero Plot')
-    plt.savefig(pz_fig_filename)
+    bsf.plot_response(f'BSF with $f_c = (${fc1:.2f} Hz, {fc2:.2f} Hz$)$', resp_fig_filename)
+    bsf.pz_plot(title='BSF Pole-Zero Plot', save_file=pz_fig_filename)
 
     plt.show()
 
@@ -9,12 +9,11 @@
  
  alpha = 0.9
  Fs = 1000 Hz
- fc = 483.37 Hz
+ fc = 483.26 Hz
 """
-import numpy as np
 import matplotlib.pyplot as plt
 
-from lti import system_response_fft, find_hpf_cutoff, pz_plot
+from filters import Filter
 
 
 def main():
@@ -30,41 +29,17 @@ def main():
     pz_fig_filename = 'fig/iir_hpf1_pzplot.png'
 
     ### H(k)
-    H1, H1_phi = system_response_fft(num, den, N_FFT)
-    H1_abs = np.absolute(H1)
+    hpf = Filter(num, den, Fs, band='hpf', N_FFT=N_FFT)
+    fc = hpf.cutoff
+    H1_phi = hpf.H_phi.copy()
     H1_phi[0] = H1_phi[1]
-    f = np.linspace(0.0, Fs, N_FFT)
-    fc = find_hpf_cutoff(f, H1_abs)
 
     print(f'fc = {fc:.2f} Hz')
 
     ### plot
-    # freq resp.
-    plt.figure(1)
-    plt.clf()
-    plt.subplot(2,1,1)
-    plt.plot(f, H1_abs, 'b')
-    plt.grid()
-    plt.xlabel('f (Hz)')
-    plt.ylabel('$|H(k)|$')
-    #plt.title('Amplitude Response $|H(k)|$')
+    hpf.plot_response(f'HPF with $f_c = ${fc:.2f} Hz', resp_fig_filename, H_phi=H1_phi)
+    hpf.pz_plot(title='HPF Pole-Zero Plot', save_file=pz_fig_filename)
 
-    # phase resp.
-    plt.subplot(2,1,2)
-    plt.plot(f, H1_phi, 'b')
-    plt.grid()
-    plt.xlabel('f (Hz)')
-    plt.ylabel('$\Phi^{\circ}$')
-    #plt.title('Phase Response $\Phi(H(k))$')
-    
-    plt.suptitle(f'HPF with $f_c = ${fc:.2f} Hz')
-    plt.subplots_adjust(hspace=0.3)
-
-    plt.savefig(resp_fig_filename)
-
-    pz_plot(num, den, title='HPF Pole-Zero Plot')
-    plt.savefig(pz_fig_filename)
-    
     plt.show()
 
 
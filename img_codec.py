@@ -0,0 +1,210 @@
+import glob
+import time
+import numpy as np
+
+from dct import dct, idct
+
+# JPEG (ITU-T T.81, Annex K) luminance quantization table
+JPEG_LUMA = np.array([
+    [16, 11, 10, 16,  24,  40,  51,  61],
+    [12, 12, 14, 19,  26,  58,  60,  55],
+    [14, 13, 16, 24,  40,  57,  69,  56],
+    [14, 17, 22, 29,  51,  87,  80,  62],
+    [18, 22, 37, 56,  68, 109, 103,  77],
+    [24, 35, 55, 64,  81, 104, 113,  92],
+    [49, 64, 78, 87, 103, 121, 120, 101],
+    [72, 92, 95, 98, 112, 100, 103,  99],
+])
+
+
+def to_blocks(img: np.array, B: int = 8) -> np.array:
+    """
+    Splits an image into B x B blocks by a reshape, a view
+    of the pixels unless padding was needed. Sides that are
+    not a multiple of B are padded by repeating edge pixels.
+
+    arg:    img     2-D image (rows, cols)
+    arg:    B       block size
+
+    return:     blocks (rows/B, cols/B, B, B)
+    """
+    R, C = img.shape
+    pad = ((0, -R % B), (0, -C % B))
+    if pad[0][1] or pad[1][1]:
+        img = np.pad(img, pad, mode='edge')
+    R2, C2 = img.shape
+    return img.reshape(R2 // B, B, C2 // B, B).swapaxes(1, 2)
+
+
+def from_blocks(blocks: np.array, shape: tuple) -> np.array:
+    """
+    Inverse of to_blocks(), crops the padding off.
+
+    arg:    blocks  (rows/B, cols/B, B, B)
+    arg:    shape   (rows, cols) of the original image
+    """
+    nR, nC, B, _ = blocks.shape
+    img = blocks.swapaxes(1, 2).reshape(nR * B, nC * B)
+    return img[0 : shape[0], 0 : shape[1]]
+
+
+def dct2_blocks(img: np.array, B: int = 8) -> np.array:
+    """
+    Computes orthonormal 2-D DCT of every B x B block of an
+    image, rows then columns, each a single batched matmul
+    over all blocks.
+
+    return:     coefficients (rows/B, cols/B, B, B)
+    """
+    blocks = to_blocks(np.asarray(img, dtype=float), B)
+    return dct(dct(blocks, axis=-1, norm='ortho'), axis=-2, norm='ortho')
+
+
+def idct2_blocks(coeffs: np.array, shape: tuple) -> np.array:
+    """
+    Inverse of dct2_blocks(), returns the image cropped to shape.
+    """
+    blocks = idct(idct(coeffs, axis=-2, norm='ortho'), axis=-1, norm='ortho')
+    return from_blocks(blocks, shape)
+
+
+def quant_table(B: int = 8, quality: int = 50) -> np.array:
+    """
+    Returns B x B quantization steps. For 8 x 8 blocks it is the
+    JPEG luminance table scaled by quality as in the IJG
+    library, other sizes take the table sampled at the same
+    relative frequencies. quality is calibrated for B = 8 only:
+    the orthonormal DCT keeps the error of a step the same for
+    any B, so PSNR stays close, but the larger coefficients of
+    larger blocks need more bits, bpp is not that of JPEG.
+
+    arg:    quality     1 (coarsest) .. 100 (finest)
+    """
+    quality = min(max(int(quality), 1), 100)
+    scale = 5000 / quality if quality < 50 else 200 - 2 * quality
+    k = np.arange(B) * 8 // B
+    T = JPEG_LUMA[np.ix_(k, k)]
+    return np.clip(np.floor((T * scale + 50) / 100), 1, 255)
+
+
+def quantize(coeffs: np.array, Q: np.array) -> np.array:
+    """
+    Rounds DCT coefficients to integer multiples of the
+    quantization steps Q (broadcast over all blocks).
+    """
+    return np.round(coeffs / Q).astype(np.int32)
+
+
+def dequantize(q: np.array, Q: np.array) -> np.array:
+    """
+    Inverse of quantize(), up to the rounding error.
+    """
+    return q * Q
+
+
+def entropy_bits(q: np.array) -> float:
+    """
+    Estimates the coded size of quantized blocks as the sum of
+    zero-order entropies of each coefficient position, i.e.
+    the bits an ideal adaptive coder per frequency would need.
+
+    arg:    q   quantized coefficients (..., B, B)
+
+    return:     bits
+    """
+    B2 = q.shape[-1] * q.shape[-2]
+    q = q.reshape(-1, B2)
+    n_blocks = q.shape[0]
+    q0 = q - q.min()
+    n_sym = int(q0.max()) + 1
+    # one histogram per coefficient position in a single bincount
+    counts = np.bincount((q0 + n_sym * np.arange(B2)).ravel(),
+                         minlength=n_sym * B2).reshape(B2, n_sym)
+    p = counts / n_blocks
+    nz = p > 0
+    return float(-np.sum(counts[nz] * np.log2(p[nz])))
+
+
+def compression_report(img: np.array, q: np.array, img2: np.array) -> dict:
+    """
+    Returns estimated compressed size & ratio against 8 bit
+    pixels, share of nonzero coefficients and PSNR of the
+    reconstruction img2.
+    """
+    bits = entropy_bits(q)
+    mse = np.mean((np.asarray(img, dtype=float) - img2) ** 2)
+    return {
+        'pixels': img.size,
+        'bits_per_pixel': bits / img.size,
+        'ratio': 8 * img.size / max(bits, 1),
+        'nonzero': np.count_nonzero(q) / q.size,
+        'psnr': 10 * np.log10(255**2 / mse) if mse > 0 else np.inf,
+    }
+
+
+def encode(img: np.array, B: int = 8, quality: int = 50) -> tuple:
+    """
+    Level shifts 8 bit pixels to -128..127, applies block DCT and
+    quantizes the coefficients.
+
+    return:     quantized coefficients, quantization table
+    """
+    Q = quant_table(B, quality)
+    return quantize(dct2_blocks(np.asarray(img, dtype=float) - 128, B), Q), Q
+
+
+def decode(q: np.array, Q: np.array, shape: tuple) -> np.array:
+    """
+    Inverse of encode(), returns pixels clipped to 0..255.
+    """
+    return np.clip(idct2_blocks(dequantize(q, Q), shape) + 128, 0, 255)
+
+
+def load_gray(file_name: str) -> np.array:
+    """
+    Reads an image file as 8 bit grayscale pixels.
+    """
+    from PIL import Image
+
+    with Image.open(file_name) as im:
+        return np.asarray(im.convert('L'))
+
+
+def main():
+    Repeat = 5
+    files = sorted(glob.glob('img/*.png'))
+
+    for B in [8, 16]:
+        for quality in [25, 50, 90]:
+            print(f'B = {B}, quality = {quality}')
+            print(f'{"image":<32} {"size":>11} {"enc MP/s":>9} {"dec MP/s":>9} '
+                    f'{"bpp":>6} {"ratio":>7} {"nonzero":>8} {"PSNR dB":>8}')
+            for file_name in files:
+                img = load_gray(file_name)
+                MP = img.size / 1e6
+
+                t1 = time.perf_counter()
+                for _ in range(Repeat):
+                    q, Q = encode(img, B, quality)
+                enc = Repeat * MP / (time.perf_counter() - t1)
+
+                t1 = time.perf_counter()
+                for _ in range(Repeat):
+                    img2 = decode(q, Q, img.shape)
+                dec = Repeat * MP / (time.perf_counter() - t1)
+
+                r = compression_report(img, q, img2)
+                size = f'{img.shape[1]}x{img.shape[0]}'
+                print(f'{file_name:<32} {size:>11} {enc:>9.1f} {dec:>9.1f} '
+                        f'{r["bits_per_pixel"]:>6.3f} {r["ratio"]:>7.1f} '
+                        f'{r["nonzero"]:>8.3f} {r["psnr"]:>8.2f}')
+            print()
+
+    # without quantization the block transform is lossless
+    img = load_gray(files[0]).astype(float)
+    Diff = np.max(np.abs(idct2_blocks(dct2_blocks(img, 8), img.shape) - img))
+    print(f'max |img - IDCT2(DCT2(img))| = {Diff:.3e}')
+
+
+if __name__ == '__main__':
+    main()
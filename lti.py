@@ -1,6 +1,8 @@
 # Functions for LTI systems
 import numpy as np
 
+from fftutils import next_fast_len, fft_forward, fft_inverse, filter_spectrum
+
 def system_response_fft(num: np.array, den: np.array, N: int) -> tuple[np.array, : np.array]:
     """
     Computes frequecy & phase response of a system using FFT
@@ -12,8 +14,8 @@ def system_response_fft(num: np.array, den: np.array, N: int) -> tuple[np.array,
     return:     H(k)    frequency response
                 H(phi)  phase response
     """
-    FFT_num = np.fft.fft(num, N)
-    FFT_den = np.fft.fft(den, N)
+    FFT_num = filter_spectrum(num, N, real=False)
+    FFT_den = filter_spectrum(den, N, real=False)
     H = FFT_num / FFT_den
     # only divide by nonzeros else 0
     H_frac = np.zeros(H.shape[0])
@@ -22,39 +24,318 @@ def system_response_fft(num: np.array, den: np.array, N: int) -> tuple[np.array,
     return H, H_phi
 
 
+def _horner(coeffs: np.array, z: np.array) -> np.array:
+    """
+    Evaluates sum c(k) z^k over the last axis of coeffs at all
+    points z by Horner's rule, one multiply & add per coefficient.
+    """
+    coeffs = np.asarray(coeffs)
+    P = np.zeros(coeffs.shape[:-1] + z.shape, dtype=complex)
+    P += coeffs[..., -1, None]
+    for k in range(coeffs.shape[-1] - 2, -1, -1):
+        P *= z
+        P += coeffs[..., k, None]
+    return P
+
+
+# the complete response also pays the delay exp(-jw(M-1)/2), crossover
+# vs. Horner's rule measured by the benchmark case
+# lti.system_response_series_fir: ~30 taps for stacks of 100 filters on
+# 512 points, ~80 taps for one filter on 8192, folding from 80 taps is
+# never slower. The FIRs of the scripts here are shorter, they keep
+# Horner's rule; amplitude_response() folds any length.
+_FOLD_MIN_TAPS = 80
+
+
+def fir_symmetry(num: np.array, rtol: float = 1e-9) -> int:
+    """
+    Returns 1 for symmetric taps h(n) = h(M-1-n), -1 for
+    antisymmetric taps h(n) = -h(M-1-n), 0 otherwise. Both give
+    a linear phase FIR. A stack (filters, taps) must share it.
+    """
+    h = np.asarray(num)
+    if np.iscomplexobj(h) or h.shape[-1] == 0:
+        return 0
+    tol = rtol * np.max(np.abs(h))
+    if np.all(np.abs(h - h[..., ::-1]) <= tol):
+        return 1
+    if np.all(np.abs(h + h[..., ::-1]) <= tol):
+        return -1
+    return 0
+
+
+def _folded_amplitude(num: np.array, om: np.array, sym: int) -> np.array:
+    """
+    Sums A(w) = sum a(k) trig((k + d) w) of the folded taps
+    a(k) = 2 h(c - k - d), c = (M-1)/2, d = 0 or 1/2, trig = cos
+    or sin, by Clenshaw's recurrence, as the terms satisfy
+    t(k+1) = 2 cos(w) t(k) - t(k-1): one real multiply & two
+    adds per pair of taps.
+    """
+    h = np.asarray(num, dtype=float)
+    M = h.shape[-1]
+    m = M // 2
+    d = 0.0 if M % 2 else 0.5
+    a = 2 * h[..., m - 1 :: -1] if m else h[..., 0:0]
+    if M % 2:
+        # middle tap, 0 for antisymmetric taps
+        a = np.concatenate((h[..., m : m + 1], a), axis=-1)
+    trig = np.cos if sym > 0 else np.sin
+
+    alpha = 2 * np.cos(om)
+    b1 = np.zeros(a.shape[:-1] + om.shape)
+    b2 = np.zeros_like(b1)
+    b0 = np.empty_like(b1)
+    # b(k) = a(k) + 2 cos(w) b(k+1) - b(k+2), in place
+    for k in range(a.shape[-1] - 1, -1, -1):
+        np.multiply(alpha, b1, out=b0)
+        b0 -= b2
+        b0 += a[..., k, None]
+        b0, b1, b2 = b2, b0, b1
+    # b1 holds b(0), b2 holds b(1)
+    return b1 * trig(d * om) - b2 * trig((d - 1) * om)
+
+
+def amplitude_response(num: np.array, N: int, Fs: float = 1.0,
+                       f: np.array = None) -> np.array:
+    """
+    Computes the real zero-phase amplitude response A(w) of a
+    linear phase FIR from its folded taps, half of them, in real
+    arithmetic. The frequency response is
+
+    H(w) = exp(-jw(M-1)/2) A(w), symmetric taps
+    H(w) = j exp(-jw(M-1)/2) A(w), antisymmetric taps
+
+    so |H| = |A|, but A keeps its sign through the zeros and has
+    no phase wrapping. Taps are folded at any length here, while
+    system_response_series() folds only from _FOLD_MIN_TAPS (80)
+    taps and sums shorter filters over all taps by Horner's rule.
+
+    arg:    num     symmetric or antisymmetric taps, (taps,) or (filters, taps)
+    arg:    N       points over 0..Fs, the bins of system_response_fft()
+    arg:    f       frequencies (Hz) to use instead of the N bins
+
+    return:     A(w)    (N,) or (filters, N)
+    """
+    sym = fir_symmetry(num)
+    if not sym:
+        raise ValueError('taps are neither symmetric nor antisymmetric')
+    f = np.arange(N) * Fs / N if f is None else np.asarray(f, dtype=float)
+    return _folded_amplitude(num, 2 * np.pi * f / Fs, sym)
+
+
 def system_response_series(num: np.array, den: np.array, N: int) -> tuple[np.array, : np.array]:
     """
     Computes frequecy & phase response of a system
     using transfer function expansion.
+
+    Numerator & denominator series in z^-1 = exp(-jw) are
+    evaluated by Horner's rule, without a table of z^-k. Stacks
+    of coefficient vectors (filters, order + 1) give responses of
+    all filters in one call, a single vector is broadcast.
+    Linear phase FIR filters of 80 or more taps are summed from
+    their folded taps instead, see amplitude_response(), shorter
+    ones stay on Horner's rule, which is as fast for them.
     
-    arg:    num coeffs of numerator polynomial
-    arg:    den coeffs of denomenator polynomial
+    arg:    num coeffs of numerator polynomial(s)
+    arg:    den coeffs of denomenator polynomial(s)
     arg:    N   resolution/points of FFT
     
-    return:     H(w)    frequency response
+    return:     H(w)    frequency response (N,) or (filters, N)
                 H(phi)  phase response
     """
     om = np.linspace(0, 2*np.pi, N) # omega
-    n1, d1 = 0, 0
-    len_poly = max(len(num), len(den))
-    # z^jw terms
-    zk = np.array([np.cos(k*om) - np.sin(k*om)*1j
-                    for k in range(len_poly)])
-
-    for n, z in zip(num, zk):  # sum numerator series
-        n1 += n * z
-
-    for d, z in zip(den, zk):  # sum denomenator series
-        d1 += d * z
+    sym = fir_symmetry(num) if np.shape(num)[-1] >= _FOLD_MIN_TAPS else 0
+    if sym and not np.any(np.asarray(den)[..., 1:]):
+        # linear phase FIR: folded taps, then the delay of (M-1)/2
+        c = (np.shape(num)[-1] - 1) / 2
+        n1 = _folded_amplitude(num, om, sym) * np.exp(-1j * c * om)
+        if sym < 0:
+            n1 = 1j * n1
+        d1 = np.asarray(den, dtype=complex)[..., 0:1] * np.ones(om.shape)
+    else:
+        z = np.exp(-1j * om)
+        n1 = _horner(num, z)    # sum numerator series
+        d1 = _horner(den, z)    # sum denomenator series
 
     H = n1 / d1  # frequency response
-    ph_n = np.arctan(n1.imag / n1.real)
-    ph_d = np.arctan(d1.imag / d1.real)
-    H_phi = 180 * (ph_n - ph_d) / np.pi # phase response
+    # only divide by nonzeros else 0
+    frac_n = np.zeros(n1.shape)
+    np.divide(n1.imag, n1.real, out=frac_n, where=n1.real!=0)
+    frac_d = np.zeros(d1.shape)
+    np.divide(d1.imag, d1.real, out=frac_d, where=d1.real!=0)
+    H_phi = 180 * (np.arctan(frac_n) - np.arctan(frac_d)) / np.pi # phase response
     
     return H, H_phi
 
 
+def tf2sos(num: np.array, den: np.array) -> np.array:
+    """
+    Splits a transfer function into second order sections,
+    poles paired with the nearest zeros.
+
+    return:     sos (sections, 6), rows [b0 b1 b2 1 a1 a2]
+    """
+    from scipy.signal import tf2sos as _tf2sos
+
+    return _tf2sos(num, den, pairing='nearest')
+
+
+def sos2tf(sos: np.array) -> tuple[np.array, np.array]:
+    """
+    Expands second order sections into num & den polynomials.
+    """
+    from scipy.signal import sos2tf as _sos2tf
+
+    return _sos2tf(np.atleast_2d(sos))
+
+
+def sos_response_fft(sos: np.array, N: int,
+                     per_section: bool = False) -> tuple[np.array, : np.array]:
+    """
+    Computes frequecy & phase response of a cascade of second
+    order sections using FFT. The 3 point spectra of all sections
+    are taken in one call and multiplied, so high orders do not
+    suffer from expanding the polynomials.
+
+    arg:    sos             second order sections (sections, 6)
+    arg:    N               resolution/points of FFT
+    arg:    per_section     return the response of each section
+
+    return:     H(k)    frequency response, (sections, N) if per_section
+                H(phi)  phase response
+    """
+    sos = np.atleast_2d(sos)
+    H = filter_spectrum(sos[:, 0:3], N, real=False) / filter_spectrum(sos[:, 3:6], N, real=False)
+    if not per_section:
+        H = np.prod(H, axis=0)
+    # only divide by nonzeros else 0
+    H_frac = np.zeros(H.shape)
+    np.divide(H.imag, H.real, out=H_frac, where=H.real!=0)
+    H_phi = 180 * np.arctan(H_frac) / np.pi
+    return H, H_phi
+
+
+def czt(x: np.array, M: int, W: complex, A: complex = 1.0, axis: int = -1) -> np.array:
+    """
+    Computes chirp-Z transform of x by Bluestein's algorithm,
+    three FFTs of length >= N + M - 1, O((N + M) log(N + M)).
+
+    X(k) = sum x(n) A^-n W^nk,  k = 0..M-1
+
+    arg:    x   sequence, N-D arrays are transformed along axis
+    arg:    M   number of output points
+    arg:    W   ratio between points on the contour
+    arg:    A   starting point of the contour
+
+    return:     X(k)
+    """
+    x = np.moveaxis(np.asarray(x), axis, -1)
+    N = x.shape[-1]
+    L = next_fast_len(N + M - 1)
+    n2 = np.arange(max(N, M), dtype=float) ** 2
+    chirp = np.exp(0.5j * np.angle(W) * n2) * np.abs(W) ** (n2 / 2)     # W^(n^2/2)
+
+    y = x * (A ** -np.arange(N) * chirp[0:N])
+    # filter v(n) = W^(-n^2/2), n = -(N-1)..M-1, laid out circularly
+    v = np.zeros(L, dtype=complex)
+    v[0:M] = 1 / chirp[0:M]
+    v[L - N + 1 : L] = 1 / chirp[N - 1 : 0 : -1]
+    # not through filter_spectrum(): a chirp is rarely reused and
+    # would only evict cached filter spectra
+    Y = fft_forward(y, L, real=False) * fft_forward(v, L, real=False)
+    X = fft_inverse(Y, L, real=False)[..., 0:M] * chirp[0:M]
+    return np.moveaxis(X, -1, axis)
+
+
+def zoom_response(num: np.array, den: np.array, f1: float, f2: float, M: int,
+                  Fs: float = 1.0) -> tuple[np.array, np.array]:
+    """
+    Computes frequency response at M points from f1 to f2 only,
+    by chirp-Z transforms of the coefficients along that arc of
+    the unit circle. Resolution (f2 - f1) / (M - 1) costs an
+    FFT of about len(coeffs) + M points instead of Fs / resolution.
+
+    arg:    num     coeffs of numerator polynomial
+    arg:    den     coeffs of denomenator polynomial
+    arg:    f1, f2  band (Hz)
+    arg:    M       number of points
+    arg:    Fs      sampling freq
+
+    return:     f       frequencies (Hz)
+                H(f)    frequency response
+    """
+    A = np.exp(2j * np.pi * f1 / Fs)
+    W = np.exp(-2j * np.pi * (f2 - f1) / ((M - 1) * Fs))
+    H = czt(num, M, W, A) / czt(den, M, W, A)
+    return np.linspace(f1, f2, M), H
+
+
+def zoom_response_sos(sos: np.array, f1: float, f2: float, M: int,
+                      Fs: float = 1.0) -> tuple[np.array, np.array]:
+    """
+    zoom_response() of a cascade of second order sections: the
+    chirp-Z transforms of all sections are taken in one call and
+    their responses multiplied, without expanding the polynomials.
+
+    arg:    sos     second order sections (sections, 6)
+
+    return:     f       frequencies (Hz)
+                H(f)    frequency response
+    """
+    sos = np.atleast_2d(sos)
+    A = np.exp(2j * np.pi * f1 / Fs)
+    W = np.exp(-2j * np.pi * (f2 - f1) / ((M - 1) * Fs))
+    H = np.prod(czt(sos[:, 0:3], M, W, A) / czt(sos[:, 3:6], M, W, A), axis=0)
+    return np.linspace(f1, f2, M), H
+
+
+def _refine(zoom, f1: float, f2: float, level: float, M: int, tol: float) -> float:
+    # zoom(f1, f2, M) returns f, H(f)
+    while True:
+        f, H = zoom(f1, f2, M)
+        above = np.abs(H) > level
+        cross = np.nonzero(above[1:] != above[:-1])[0]
+        if len(cross) == 0:
+            return np.nan
+        cnt = cross[0]
+        f1, f2 = f[cnt], f[cnt + 1]
+        if f2 - f1 < tol:
+            H1, H2 = np.abs(H[cnt]), np.abs(H[cnt + 1])
+            return f1 + (level - H1) / (H2 - H1) * (f2 - f1)
+
+
+def refine_edge(num: np.array, den: np.array, f1: float, f2: float, level: float,
+                Fs: float = 1.0, M: int = 64, tol: float = 1e-6) -> float:
+    """
+    Returns the frequency in [f1, f2] where |H(f)| crosses level,
+    e.g. MaxAmp / sqrt(2) for a cutoff or 10^(-As/20) for a
+    stopband edge. The first bracketing pair of a zoom_response()
+    is zoomed into again until it is narrower than tol Hz, the
+    crossing is then linearly interpolated.
+
+    arg:    f1, f2  band holding one crossing, such as the FFT bins
+                    around an edge found by the find_* functions
+    arg:    level   amplitude of the edge
+    arg:    M       points per zoom
+    arg:    tol     width of the final bracket (Hz)
+
+    return:     edge frequency (Hz), NaN if |H| does not cross level
+    """
+    return _refine(lambda f1, f2, M: zoom_response(num, den, f1, f2, M, Fs),
+                   f1, f2, level, M, tol)
+
+
+def refine_edge_sos(sos: np.array, f1: float, f2: float, level: float,
+                    Fs: float = 1.0, M: int = 64, tol: float = 1e-6) -> float:
+    """
+    refine_edge() of a cascade of second order sections, on
+    zoom_response_sos(), so high orders stay accurate.
+    """
+    return _refine(lambda f1, f2, M: zoom_response_sos(sos, f1, f2, M, Fs),
+                   f1, f2, level, M, tol)
+
+
 def find_lpf_cutoff(f: np.array, H1_abs: np.array) -> np.float64:
     """
     Returns cut-off frequency of an LPF
@@ -234,6 +515,89 @@ def find_bsf_stopband(f: np.array, H1_abs: np.array, As: float) -> np.float64:
     return fs1, fs2
 
 
+def _first(mask: np.array) -> tuple[np.array, np.array]:
+    # index of the first True along the last axis & whether there is one
+    return np.argmax(mask, axis=-1), np.any(mask, axis=-1)
+
+
+def _last(mask: np.array) -> tuple[np.array, np.array]:
+    # index of the last True along the last axis & whether there is one
+    return mask.shape[-1] - 1 - np.argmax(mask[..., ::-1], axis=-1), np.any(mask, axis=-1)
+
+
+def _crossing(f: np.array, H_abs: np.array, level: np.array,
+              i0: np.array, valid: np.array) -> np.array:
+    # linear interpolation of the level between bins i0 and i0 + 1
+    i0 = np.clip(i0, 0, len(f) - 2)[..., None]
+    H0 = np.take_along_axis(H_abs, i0, axis=-1)[..., 0]
+    H1 = np.take_along_axis(H_abs, i0 + 1, axis=-1)[..., 0]
+    f0, f1 = f[i0[..., 0]], f[i0[..., 0] + 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fx = f0 + (level - H0) / (H1 - H0) * (f1 - f0)
+    return np.where(valid, fx, np.nan)
+
+
+def find_edges(f: np.array, H_abs: np.array, level, band: str) -> np.array:
+    """
+    Returns the frequencies where amplitude responses cross
+    level, interpolated between bins, for a stack of responses
+    at once. Edges are searched like the find_* functions: an
+    LPF falls from f[0], an HPF from its peak downwards, a BPF
+    from its peak both ways and a BSF from both ends inwards.
+
+    arg:    f       frequencies (N,)
+    arg:    H_abs   amplitude responses (..., N)
+    arg:    level   amplitude of the edge, scalar or one per response
+    arg:    band    'lpf', 'hpf', 'bpf' or 'bsf'
+
+    return:     edges (...) for 'lpf' & 'hpf', (..., 2) for 'bpf' & 'bsf',
+                NaN where a response does not cross level
+    """
+    f = np.asarray(f)
+    H_abs = np.asarray(H_abs)
+    level = np.broadcast_to(level, H_abs.shape[:-1])
+    below = H_abs <= level[..., None]
+    n = np.arange(H_abs.shape[-1])
+    peak = np.argmax(H_abs, axis=-1)[..., None]
+
+    if band == 'lpf':
+        i1, valid = _first(below)
+        return _crossing(f, H_abs, level, i1 - 1, valid & (i1 > 0))
+    if band == 'hpf':
+        i0, valid = _last(below & (n < peak))
+        return _crossing(f, H_abs, level, i0, valid)
+    if band == 'bpf':
+        i0, valid0 = _last(below & (n < peak))
+        i1, valid1 = _first(below & (n > peak))
+        return np.stack((_crossing(f, H_abs, level, i0, valid0),
+                         _crossing(f, H_abs, level, i1 - 1, valid1)), axis=-1)
+    if band == 'bsf':
+        i1, valid1 = _first(below)
+        i0, valid0 = _last(below)
+        return np.stack((_crossing(f, H_abs, level, i1 - 1, valid1 & (i1 > 0)),
+                         _crossing(f, H_abs, level, i0, valid0 & (i0 < len(n) - 1))),
+                        axis=-1)
+    raise ValueError(f'unknown band: {band}')
+
+
+def find_cutoff(f: np.array, H_abs: np.array, band: str) -> np.array:
+    """
+    Returns cut-off frequencies (-3 dB from each response's
+    maximum) of a stack of responses, see find_edges().
+    """
+    H_abs = np.asarray(H_abs)
+    return find_edges(f, H_abs, np.max(H_abs, axis=-1) / np.sqrt(2), band)
+
+
+def find_stopband(f: np.array, H_abs: np.array, As: float, band: str) -> np.array:
+    """
+    Returns stopband edge frequencies, where responses fall to
+    the attenuation As (dB), of a stack of responses, see
+    find_edges().
+    """
+    return find_edges(f, H_abs, 10**(-As/20), band)
+
+
 def pz_plot(num: np.array, den: np.array, title: str='Pole-Zero Plot', show: bool=False, save_file: str=None) -> None:
     """
     Plots poles & zeros for a system's transfer function.
@@ -241,7 +605,13 @@ def pz_plot(num: np.array, den: np.array, title: str='Pole-Zero Plot', show: boo
     ### PZ
     zeros = np.roots(num).astype('complex')
     poles = np.roots(den).astype('complex')
-    
+    plot_pz(zeros, poles, title, show, save_file)
+
+
+def plot_pz(zeros: np.array, poles: np.array, title: str='Pole-Zero Plot', show: bool=False, save_file: str=None) -> None:
+    """
+    Plots given poles & zeros with the unit circle.
+    """
     import matplotlib.pyplot as plt
     
     figure, axes = plt.subplots()
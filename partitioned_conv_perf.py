@@ -0,0 +1,42 @@
+# partitioned convolution vs. overlap & add with a long impulse response
+import numpy as np
+import time
+
+from conv_overlap_add import conv_overlap_add_fft
+from conv_overlap_save import PartitionedConvolver
+
+Fs = 44100
+Duration = 10               # sec. of input
+Nh = 3 * Fs                 # 3 sec. reverb tail
+B_grid = [128, 512, 2048]
+
+x = np.random.normal(0, 1, Duration * Fs)
+# exponentially decaying noise as a room response
+h = np.random.normal(0, 1, Nh) * np.exp(-np.arange(Nh) / (0.5 * Fs))
+y_ref = conv_overlap_add_fft(h, x, Nh)  # warm up & reference
+
+### overlap and add, blocks as long as the filter
+t1 = time.perf_counter()
+y_OA = conv_overlap_add_fft(h, x, Nh)
+elapsed_oa = time.perf_counter() - t1
+print(f'Nx = {len(x)}, Nh = {Nh}, Fs = {Fs} Hz')
+print(f'{"method":<22} {"latency":>10} {"time (s)":>9} {"x real-time":>12} {"max diff":>10}')
+print(f'{"overlap-add":<22} {1e3 * Nh / Fs:>7.1f} ms {elapsed_oa:>9.3f} '
+        f'{Duration / elapsed_oa:>12.1f} {"-":>10}')
+
+### partitioned, block by block
+for B in B_grid:
+    conv = PartitionedConvolver(h, B)
+    Nx2 = -(-len(x) // B) * B
+    x2 = np.zeros(Nx2)
+    x2[0:len(x)] = x
+
+    t1 = time.perf_counter()
+    y_blocks = [conv.process(x2[cnt : cnt + B]) for cnt in range(0, Nx2, B)]
+    elapsed = time.perf_counter() - t1
+
+    y_blocks.append(conv.flush())
+    y_UP = np.concatenate(y_blocks)[0 : len(y_ref)]
+    Diff = np.max(np.abs(y_UP - y_ref))
+    print(f'{f"partitioned B = {B}":<22} {1e3 * B / Fs:>7.1f} ms {elapsed:>9.3f} '
+            f'{Duration / elapsed:>12.1f} {Diff:>10.2e}')
@@ -0,0 +1,209 @@
+"""
+ Regenerates the figures in fig/ headless & in parallel.
+
+ Every producer script runs under runpy on the Agg backend in a
+ process pool, plt.show() does nothing there. A producer is
+ skipped when the hash of its inputs matches the cache of the
+ last successful run and its figures exist. The inputs are the
+ script, the local modules it imports (recursively), the data
+ files it names and the matplotlib version. Coefficients live in
+ the code, so they are covered by the code hash.
+
+ python render_figures.py [fir_lpf1.py ...] [--force] [--jobs 4] [--dry-run]
+"""
+import argparse
+import ast
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import runpy
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CACHE_FILE = 'fig/.render_cache.json'
+
+# scripts saving into fig/, chirp.py is left out as it plays the chirp aloud
+PRODUCERS = (
+    'fir_lpf1.py', 'fir_lpf2.py', 'fir_hpf1.py', 'fir_bpf1.py', 'fir_bsf1.py',
+    'iir_lpf1.py', 'iir_hpf1.py', 'iir_bpf1.py', 'iir_bsf1.py',
+    'window_fir_lpf1.py', 'window_fir_hpf1.py', 'window_fir_bpf1.py', 'window_fir_bsf1.py',
+    'diff_eq.py', 'ecg_mit.py',
+)
+
+_FIGURE = re.compile(r"""['"](fig/[^'"]+\.png)['"]""")
+_DATA = re.compile(r"""['"]((?:data|img)/[^'"]+\.\w+)['"]""")
+
+
+def _read(path: str) -> bytes:
+    with open(os.path.join(ROOT, path), 'rb') as file:
+        return file.read()
+
+
+def local_imports(script: str) -> list:
+    """
+    Returns the modules of this repo a script imports, directly or
+    through other local modules, also from inside functions.
+    """
+    found, todo = set(), [script]
+    while todo:
+        tree = ast.parse(_read(todo.pop()))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                path = name.split('.')[0] + '.py'
+                if path not in found and path != script and os.path.isfile(os.path.join(ROOT, path)):
+                    found.add(path)
+                    todo.append(path)
+    return sorted(found)
+
+
+def inputs(script: str) -> dict:
+    """
+    Returns the figures a script writes & the files its output depends on.
+    """
+    source = _read(script).decode()
+    data = sorted(p for p in set(_DATA.findall(source)) if os.path.isfile(os.path.join(ROOT, p)))
+    return {
+        'figures': sorted(set(_FIGURE.findall(source))),
+        'files': [script] + local_imports(script) + data,
+    }
+
+
+def input_hash(files: list) -> str:
+    import matplotlib
+
+    h = hashlib.sha256(f'matplotlib {matplotlib.__version__}\n'.encode())
+    for path in files:
+        h.update(path.encode() + b'\0')
+        h.update(hashlib.sha256(_read(path)).digest())
+    return h.hexdigest()
+
+
+def _init_worker():
+    os.environ['MPLBACKEND'] = 'Agg'
+    import matplotlib
+
+    matplotlib.use('Agg', force=True)
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+
+def _render(script: str) -> tuple:
+    """
+    Runs a producer, returns (script, seconds, error or None, its output).
+    """
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    # a worker runs several producers: start each from a fresh state,
+    # rcParams set by one (e.g. text.usetex) must not leak into the next
+    plt.close('all')
+    matplotlib.rc_file_defaults()
+    out = io.StringIO()
+    error = None
+    t1 = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(out), warnings.catch_warnings():
+            # plt.show() on a non-interactive backend
+            warnings.simplefilter('ignore', UserWarning)
+            runpy.run_path(os.path.join(ROOT, script), run_name='__main__')
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'.splitlines()[0]
+    finally:
+        plt.close('all')
+    return script, time.perf_counter() - t1, error, out.getvalue()
+
+
+def render(scripts=PRODUCERS, force: bool = False, n_jobs: int = None,
+           cache_file: str = CACHE_FILE, dry_run: bool = False,
+           verbose: bool = True) -> dict:
+    """
+    Renders the figures of all out-of-date producers across a
+    process pool and updates the cache with the successful ones.
+
+    return:     dict script -> {'status': 'skipped' | 'rendered' | 'failed',
+                'seconds', 'figures', 'error'}
+    """
+    cache_path = os.path.join(ROOT, cache_file)
+    try:
+        with open(cache_path) as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        cache = {}
+
+    results, todo, hashes = {}, [], {}
+    for script in scripts:
+        info = inputs(script)
+        hashes[script] = input_hash(info['files'])
+        missing = [p for p in info['figures'] if not os.path.isfile(os.path.join(ROOT, p))]
+        if not force and not missing and cache.get(script, {}).get('hash') == hashes[script]:
+            results[script] = {'status': 'skipped', 'seconds': 0.0,
+                               'figures': info['figures'], 'error': None}
+        else:
+            results[script] = {'status': 'pending', 'seconds': 0.0,
+                               'figures': info['figures'], 'error': None}
+            todo.append(script)
+
+    t1 = time.perf_counter()
+    if todo and not dry_run:
+        n_jobs = min(n_jobs or os.cpu_count(), len(todo))
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker) as pool:
+            futures = [pool.submit(_render, script) for script in todo]
+            for future in as_completed(futures):
+                script, seconds, error, _ = future.result()
+                results[script].update(status='failed' if error else 'rendered',
+                                       seconds=seconds, error=error)
+                if not error:
+                    cache[script] = {'hash': hashes[script], 'seconds': round(seconds, 3),
+                                     'figures': results[script]['figures']}
+                if verbose:
+                    print(f'{script:<22} {seconds:>8.2f} s  '
+                            f'{error or ", ".join(results[script]["figures"])}')
+        with open(cache_path, 'w') as file:
+            json.dump(cache, file, indent=1, sort_keys=True)
+    elapsed = time.perf_counter() - t1
+
+    if verbose:
+        for script in scripts:
+            r = results[script]
+            if r['status'] in ('skipped', 'pending'):
+                status = 'up to date' if r['status'] == 'skipped' else 'out of date'
+                print(f'{script:<22} {status:>10}  {", ".join(r["figures"])}')
+        n = {s: sum(r['status'] == s for r in results.values())
+             for s in ('rendered', 'failed', 'skipped', 'pending')}
+        busy = sum(r['seconds'] for r in results.values())
+        print(f'{n["rendered"]} rendered, {n["failed"]} failed, {n["skipped"]} up to date'
+                + (f', {n["pending"]} out of date' if dry_run else '')
+                + f' in {elapsed:.2f} s wall ({busy:.2f} s of rendering)')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='regenerate the figures in fig/')
+    parser.add_argument('scripts', nargs='*', help='producers, all by default')
+    parser.add_argument('-f', '--force', action='store_true',
+                        help='render even if the inputs are unchanged')
+    parser.add_argument('-j', '--jobs', type=int, help='worker processes, all cores by default')
+    parser.add_argument('--cache', default=CACHE_FILE, help='JSON file of input hashes')
+    parser.add_argument('-n', '--dry-run', action='store_true',
+                        help='only list the out of date producers')
+    args = parser.parse_args()
+
+    results = render(args.scripts or PRODUCERS, args.force, args.jobs, args.cache, args.dry_run)
+    sys.exit(1 if any(r['status'] == 'failed' for r in results.values()) else 0)
+
+
+if __name__ == '__main__':
+    main()
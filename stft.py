@@ -0,0 +1,213 @@
+import numpy as np
+from scipy.signal import get_window
+
+# numpy 2 FFTs can write into a given buffer
+_FFT_OUT = np.lib.NumpyVersion(np.__version__) >= '2.0.0'
+
+
+def frame_count(N: int, frame_len: int, hop: int) -> int:
+    """
+    Returns the number of frames stft() yields for N samples:
+    the signal is preceded by frame_len - hop zeros and frames
+    continue until every sample was seen by all frames
+    overlapping it.
+    """
+    return (N - 1 + frame_len - hop) // hop + 1 if N > 0 else 0
+
+
+def _window(window, frame_len: int) -> np.array:
+    if isinstance(window, (str, tuple)):
+        return get_window(window, frame_len, fftbins=True)
+    window = np.asarray(window, dtype=float)
+    if window.shape != (frame_len,):
+        raise ValueError(f'window must have {frame_len} samples')
+    return window
+
+
+def _hops(source, hop: int, n_hops: int):
+    """
+    Yields n_hops blocks of hop samples from an array or an
+    open soundfile.SoundFile, zero filled past the end, all in
+    one reused buffer.
+    """
+    if isinstance(source, np.ndarray):
+        chunk = np.zeros((hop,) + source.shape[1:])
+        for cnt in range(n_hops):
+            seg = source[cnt * hop : (cnt + 1) * hop]
+            chunk[0 : len(seg)] = seg
+            chunk[len(seg):] = 0
+            yield chunk
+    else:
+        chunk = np.zeros((hop, source.channels) if source.channels > 1 else hop)
+        for cnt in range(n_hops):
+            # reads up to hop frames, fill_value zeroes the rest
+            source.read(hop, dtype='float64', out=chunk, fill_value=0)
+            yield chunk
+
+
+def stft(source, frame_len: int = 1024, hop: int = None, window='hann'):
+    """
+    Generator of short-time spectra, one frame at a time.
+
+    Frames are pulled hop samples at a time from an array or a
+    soundfile.SoundFile (or a file name opened as one), so
+    memory does not depend on the length of the signal. One
+    frame buffer and one spectrum buffer are reused, a caller
+    keeping spectra must copy them.
+
+    arg:    source      samples (N,) or (N, channels), SoundFile or file name
+    arg:    frame_len   samples per frame
+    arg:    hop         frame advance, frame_len // 4 by default
+    arg:    window      analysis window, a scipy window name or samples
+
+    yield:      X(k), k = 0..frame_len/2, (frame_len//2 + 1,) + channels
+    """
+    hop = hop or frame_len // 4
+    if not 0 < hop <= frame_len:
+        raise ValueError('hop must be in 1..frame_len')
+    if isinstance(source, str):
+        import soundfile as sf
+
+        with sf.SoundFile(source) as file:
+            yield from stft(file, frame_len, hop, window)
+        return
+
+    if isinstance(source, np.ndarray):
+        N, channels = len(source), source.shape[1:]
+    else:
+        N = source.frames
+        channels = (source.channels,) if source.channels > 1 else ()
+    w = _window(window, frame_len).reshape((frame_len,) + (1,) * len(channels))
+
+    frame = np.zeros((frame_len,) + channels)
+    windowed = np.empty_like(frame)
+    X = np.empty((frame_len // 2 + 1,) + channels, dtype=complex)
+    for chunk in _hops(source, hop, frame_count(N, frame_len, hop)):
+        frame[0 : frame_len - hop] = frame[hop:frame_len]
+        frame[frame_len - hop :] = chunk
+        np.multiply(frame, w, out=windowed)
+        if _FFT_OUT:
+            np.fft.rfft(windowed, axis=0, out=X)
+        else:
+            X[...] = np.fft.rfft(windowed, axis=0)
+        yield X
+
+
+def istft(spectra, frame_len: int = 1024, hop: int = None, window='hann',
+          length: int = None):
+    """
+    Generator inverting stft() by weighted overlap-add (WOLA):
+    each frame is windowed again, added into a frame_len
+    accumulator and the completed hop samples are divided by
+    the sum of the squared overlapping windows, which is
+    periodic in hop and computed once.
+
+    arg:    spectra     iterable of spectra as yielded by stft()
+    arg:    length      number of samples to return, all by default
+
+    yield:      blocks of up to hop samples (a reused buffer)
+    """
+    hop = hop or frame_len // 4
+    w = _window(window, frame_len)
+    norm = np.zeros(hop)
+    for cnt in range(0, frame_len, hop):
+        seg = w[cnt : cnt + hop] ** 2
+        norm[0 : len(seg)] += seg
+    if np.min(norm) < 1e-10:
+        raise ValueError('window and hop do not overlap-add to a nonzero sum')
+
+    skip = frame_len - hop      # the zeros stft() put in front
+    acc = None
+    for X in spectra:
+        if acc is None:
+            channels = X.shape[1:]
+            shape = (-1,) + (1,) * len(channels)
+            w_ch, norm_ch = w.reshape(shape), norm.reshape(shape)
+            acc = np.zeros((frame_len,) + channels)
+            out = np.empty((hop,) + channels)
+        acc += np.fft.irfft(X, frame_len, axis=0) * w_ch
+        np.divide(acc[0:hop], norm_ch, out=out)
+        acc[0 : frame_len - hop] = acc[hop:frame_len]
+        acc[frame_len - hop :] = 0
+
+        y = out[min(skip, hop):]
+        skip -= hop - len(y)
+        if length is not None:
+            y = y[0:length]
+            length -= len(y)
+        if len(y):
+            yield y
+        if length == 0:
+            return
+
+
+def spectrogram(source, frame_len: int = 1024, hop: int = None,
+                window='hann', Fs: float = 1.0) -> tuple:
+    """
+    Collects the power spectra |X(k)|^2 of stft() into an array.
+    Only the result grows with the signal, not the work buffers.
+
+    return:     t (frame centres in sec.), f (Hz), S (frames, bins) + channels
+    """
+    hop = hop or frame_len // 4
+    if isinstance(source, str):
+        import soundfile as sf
+
+        with sf.SoundFile(source) as file:
+            return spectrogram(file, frame_len, hop, window, file.samplerate)
+
+    N = len(source) if isinstance(source, np.ndarray) else source.frames
+    n_frames = frame_count(N, frame_len, hop)
+    S = None
+    for cnt, X in enumerate(stft(source, frame_len, hop, window)):
+        if S is None:
+            S = np.empty((n_frames,) + X.shape)
+        np.abs(X, out=S[cnt])
+        np.square(S[cnt], out=S[cnt])
+    t = (np.arange(n_frames) * hop + hop - frame_len / 2) / Fs
+    f = np.fft.rfftfreq(frame_len, 1 / Fs)
+    return t, f, S
+
+
+def main():
+    import time
+    import tracemalloc
+    import soundfile as sf
+
+    FrameLen = 1024
+    Hop = 256
+
+    # streaming round trip, block by block from the file
+    for name in ['StarWars3.wav', 'StarWars60.wav']:
+        FileName = 'data/wave/' + name
+        Info = sf.info(FileName)
+        tracemalloc.start()
+        t1 = time.perf_counter()
+        Diff = 0.0
+        with sf.SoundFile(FileName) as file, sf.SoundFile(FileName) as ref:
+            for y in istft(stft(file, FrameLen, Hop), FrameLen, Hop, length=Info.frames):
+                Diff = max(Diff, np.max(np.abs(y - ref.read(len(y)))))
+        elapsed = time.perf_counter() - t1
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f'{name}: {Info.duration:.0f} sec., STFT & ISTFT {elapsed:.3f} sec. '
+                f'({Info.duration / elapsed:.0f}x real-time), '
+                f'peak memory {peak / 1024:.0f} KiB, max |x - ISTFT(STFT(x))| = {Diff:.3e}')
+
+    # spectrogram of 60 sec. of music
+    FileName = 'data/wave/StarWars60.wav'
+    t, f, S = spectrogram(FileName, FrameLen, Hop)
+
+    import matplotlib.pyplot as plt
+
+    plt.figure()
+    plt.pcolormesh(t, f, 10 * np.log10(S.T + 1e-12), shading='auto', cmap='magma')
+    plt.colorbar(label='dB')
+    plt.xlabel('t (sec.)')
+    plt.ylabel('f (Hz)')
+    plt.title('Spectrogram')
+    plt.show()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+import numpy as np
+from scipy.signal import lfilter, lfilter_zi, sosfilt, sosfilt_zi
+
+
+def tdf2_direct(num: np.array, den: np.array, x: np.array) -> np.array:
+    """
+    Filters x by the difference equation in transposed direct
+    form II, one sample at a time.
+
+    y(n) = b0 x(n) + z1(n-1)
+    z_i(n) = b_i x(n) - a_i y(n) + z_(i+1)(n-1)
+    """
+    b = np.asarray(num, dtype=float) / den[0]
+    a = np.asarray(den, dtype=float) / den[0]
+    order = max(len(b), len(a)) - 1
+    b = np.pad(b, (0, order + 1 - len(b)))
+    a = np.pad(a, (0, order + 1 - len(a)))
+    z = np.zeros(order + 1)
+    y = np.zeros(len(x))
+    for n in range(len(x)):
+        y[n] = b[0] * x[n] + z[0]
+        for i in range(order):
+            z[i] = b[i + 1] * x[n] - a[i + 1] * y[n] + z[i + 1]
+    return y
+
+
+class StreamFilter:
+    """
+    Streaming IIR/FIR filter of the difference equation
+
+    sum a(k) y(n-k) = sum b(k) x(n-k)
+
+    in transposed direct form II. The recursion runs in
+    scipy.signal.lfilter, the delay line state z is kept between
+    calls of process(), so concatenated outputs equal filtering
+    the whole sequence at once. Blocks may be N-D, all channels
+    are filtered along axis in one call.
+
+    arg:    num     coeffs of numerator polynomial b
+    arg:    den     coeffs of denomenator polynomial a
+    arg:    axis    time axis of the blocks
+    arg:    initial 'zeros' starts at rest, 'step' in the steady
+                    state of the first sample held since ever,
+                    which avoids a start-up transient on offsets
+                    such as an ECG baseline
+    arg:    dtype   coefficients, state & output are cast to it,
+                    e.g. float32, default from the coefficients
+    """
+
+    def __init__(self, num, den, axis: int = -1, initial: str = 'zeros', dtype=None):
+        if initial not in ('zeros', 'step'):
+            raise ValueError(f'unknown initial state: {initial}')
+        self.num = np.atleast_1d(np.asarray(num, dtype=dtype))
+        self.den = np.atleast_1d(np.asarray(den, dtype=dtype))
+        self.dtype = dtype
+        self.axis = axis
+        self.initial = initial
+        self.order = max(len(self.num), len(self.den)) - 1
+        self.reset()
+
+    def reset(self):
+        """
+        Returns the filter to its initial state.
+        """
+        self._zi = None
+        self.samples = 0
+
+    def _state(self, x: np.array) -> np.array:
+        lead = x.shape[:-1]
+        if self._zi is None:
+            dtype = self.dtype or np.result_type(self.num, self.den, x, float)
+            if self.initial == 'step':
+                zi = lfilter_zi(self.num, self.den)
+                self._zi = (x[..., 0:1] * zi).astype(dtype)
+            else:
+                self._zi = np.zeros(lead + (self.order,), dtype=dtype)
+        elif self._zi.shape[:-1] != lead:
+            raise ValueError(f'block has channels {lead}, expected {self._zi.shape[:-1]}')
+        return self._zi
+
+    def process(self, block: np.array) -> np.array:
+        """
+        Filters the next block of samples.
+
+        arg:    block   samples, time along axis
+
+        return:     y(n) of the block, same shape
+        """
+        x = np.moveaxis(np.asarray(block, dtype=self.dtype), self.axis, -1)
+        if self._zi is None and x.shape[-1] == 0:
+            # no state before the first sample, 'step' needs it
+            return np.moveaxis(x.astype(self.dtype or np.result_type(self.num, self.den, x, float)),
+                               -1, self.axis)
+        if self.order == 0:
+            y = x * (self.num[0] / self.den[0])
+        else:
+            y, self._zi = lfilter(self.num, self.den, x, axis=-1, zi=self._state(x))
+        self.samples += x.shape[-1]
+        return np.moveaxis(y, -1, self.axis)
+
+
+class SOSFilter:
+    """
+    Streaming IIR filter as a cascade of second order sections,
+    each in transposed direct form II, run by
+    scipy.signal.sosfilt with the state of every section kept
+    between calls of process(). Poles of a section are roots of
+    a quadratic only, so high orders stay stable & accurate
+    even in float32, where the expanded polynomial does not.
+
+    arg:    sos     second order sections (sections, 6), see lti.tf2sos()
+    arg:    axis    time axis of the blocks
+    arg:    initial 'zeros' or 'step', as for StreamFilter
+    arg:    dtype   coefficients, state & output are cast to it
+    """
+
+    def __init__(self, sos, axis: int = -1, initial: str = 'zeros', dtype=None):
+        if initial not in ('zeros', 'step'):
+            raise ValueError(f'unknown initial state: {initial}')
+        self.sos = np.atleast_2d(np.asarray(sos, dtype=dtype))
+        self.axis = axis
+        self.initial = initial
+        self.dtype = dtype
+        self.reset()
+
+    def reset(self):
+        """
+        Returns the filter to its initial state.
+        """
+        self._zi = None
+        self.samples = 0
+
+    def _state(self, x: np.array) -> np.array:
+        lead = x.shape[:-1]
+        n_sections = self.sos.shape[0]
+        if self._zi is None:
+            dtype = self.dtype or np.result_type(self.sos, x, float)
+            # (sections,) + channels + (2,)
+            zi = np.zeros((n_sections,) + lead + (2,), dtype=dtype)
+            if self.initial == 'step':
+                zi += sosfilt_zi(self.sos).reshape((n_sections,) + (1,) * len(lead) + (2,))
+                zi *= x[..., 0:1]
+            self._zi = zi
+        elif self._zi.shape[1:-1] != lead:
+            raise ValueError(f'block has channels {lead}, expected {self._zi.shape[1:-1]}')
+        return self._zi
+
+    def process(self, block: np.array) -> np.array:
+        """
+        Filters the next block of samples.
+
+        arg:    block   samples, time along axis
+
+        return:     y(n) of the block, same shape
+        """
+        x = np.moveaxis(np.asarray(block, dtype=self.dtype), self.axis, -1)
+        if self._zi is None and x.shape[-1] == 0:
+            # no state before the first sample, 'step' needs it
+            return np.moveaxis(x.astype(self.dtype or np.result_type(self.sos, x, float)),
+                               -1, self.axis)
+        y, self._zi = sosfilt(self.sos, x, axis=-1, zi=self._state(x))
+        self.samples += x.shape[-1]
+        return np.moveaxis(y, -1, self.axis)
+
+
+def read_mitbih(record: str, Channels: int = 2) -> np.array:
+    """
+    Reads a 212 format MIT-BIH record as (channels, samples) mV.
+    """
+    import wfutils
+
+    ADC_offset = 1024
+    ADC_gain = 200
+    with open(record, 'rb') as file:
+        d = wfutils.read_uint12(file.read())
+    return (d.reshape(-1, Channels).T.astype(float) - ADC_offset) / ADC_gain
+
+
+def main():
+    import time
+    from scipy import signal
+
+    Fs = 360
+    # 0.5..40 Hz band-pass against baseline wander & noise
+    num, den = signal.butter(4, [0.5, 40], btype='bandpass', fs=Fs)
+    print(f'IIR band-pass, order {len(den) - 1}, Fs = {Fs} Hz')
+    print(f'{"record":<8} {"block":>7} {"time (s)":>9} {"samples/s":>11} {"max diff":>10}')
+
+    for record in ['data/ecg/100.dat', 'data/ecg/101.dat']:
+        ECG = read_mitbih(record)
+        name = record.split('/')[-1]
+        y_ref = lfilter(num, den, ECG, axis=-1)
+
+        for Block in [64, 360, 4096, ECG.shape[1]]:
+            filt = StreamFilter(num, den)
+            t1 = time.perf_counter()
+            y = np.concatenate([filt.process(ECG[:, cnt : cnt + Block])
+                                for cnt in range(0, ECG.shape[1], Block)], axis=-1)
+            elapsed = time.perf_counter() - t1
+            Diff = np.max(np.abs(y - y_ref))
+            print(f'{name:<8} {Block:>7} {elapsed:>9.3f} {ECG.size / elapsed:>11.3e} {Diff:>10.2e}')
+
+        # per sample loop on one lead, first 10^4 samples
+        Nloop = pow(10,4)
+        t1 = time.perf_counter()
+        y_loop = tdf2_direct(num, den, ECG[0, 0:Nloop])
+        elapsed = time.perf_counter() - t1
+        Diff = np.max(np.abs(y_loop - y_ref[0, 0:Nloop]))
+        print(f'{name:<8} {"loop":>7} {elapsed * ECG.size / Nloop:>9.3f} '
+                f'{Nloop / elapsed:>11.3e} {Diff:>10.2e}  (est.)')
+
+    # no start-up transient on the ADC baseline
+    ECG = read_mitbih('data/ecg/100.dat')
+    y0 = StreamFilter(num, den).process(ECG[:, 0:20])
+    y1 = StreamFilter(num, den, initial='step').process(ECG[:, 0:20])
+    print(f'first 20 samples, max |y|: zeros = {np.max(np.abs(y0)):.3f} mV, '
+            f'step = {np.max(np.abs(y1)):.3f} mV')
+
+    # high order low-pass: direct form vs. second order sections,
+    # against SOS in float64 on record 100
+    from lti import tf2sos
+    x = ECG[0]
+    print(f'{"order":>5} {"form":<7} {"dtype":<8} {"time (s)":>9} {"samples/s":>11} {"max error":>10}')
+    for order in [4, 8, 12]:
+        num, den = signal.butter(order, 10, fs=Fs)
+        sos = tf2sos(num, den)
+        y_ref = sosfilt(sos, x)
+        for form in ['direct', 'sos']:
+            for dtype in [np.float64, np.float32]:
+                if form == 'direct':
+                    filt = StreamFilter(num, den, dtype=dtype)
+                else:
+                    filt = SOSFilter(sos, dtype=dtype)
+                t1 = time.perf_counter()
+                y = np.concatenate([filt.process(x[cnt : cnt + 4096])
+                                    for cnt in range(0, len(x), 4096)])
+                elapsed = time.perf_counter() - t1
+                with np.errstate(invalid='ignore', over='ignore'):
+                    Err = np.max(np.abs(y - y_ref))
+                print(f'{order:>5} {form:<7} {np.dtype(dtype).name:<8} {elapsed:>9.3f} '
+                        f'{len(x) / elapsed:>11.3e} {Err:>10.2e}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+import numpy as np
+from scipy.signal import lfilter
+
+
+class SlidingDFT:
+    """
+    Streaming DFT of a few frequencies over a sliding window of
+    the last N samples, updated at every sample:
+
+    X_k(n) = W (X_k(n-1) + W^-N x(n) - x(n-N)),   W = exp(j 2 pi k / N)
+
+    O(1) per sample & frequency. A block is processed at once in
+    closed form, X(n0+m) = W^(m+1) (X(n0-1) + cumsum(W^-i y(n0+i))),
+    the last N samples are kept in a ring for x(n-N). At most
+    every `resync` samples X is recomputed from the ring, so
+    rounding errors do not build up. State is kept between
+    calls, a block may have any length.
+
+    k = f N / Fs need not be an integer, X_k(n) is then the DTFT
+    of the window at f.
+
+    arg:    freqs   frequencies to track (Hz)
+    arg:    N       window length (samples)
+    arg:    Fs      sampling rate (Hz)
+    arg:    axis    time axis of the blocks
+    arg:    resync  samples between exact recomputations, N by default
+    """
+
+    def __init__(self, freqs, N: int, Fs: float = 1.0, axis: int = -1,
+                 resync: int = None):
+        self.freqs = np.atleast_1d(np.asarray(freqs, dtype=float))
+        self.N = N
+        self.Fs = Fs
+        self.axis = axis
+        self.resync = resync or N
+        self.k = self.freqs * N / Fs
+        self.W = np.exp(2j * np.pi * self.k / N)
+        self.W_N = np.exp(-2j * np.pi * self.k)     # W^-N, 1 for integer k
+        # E[m, k] = W^-m, the DFT of the window for resync
+        self.E = np.exp(-2j * np.pi * np.outer(np.arange(N), self.k) / N)
+        self.reset()
+
+    def reset(self):
+        """
+        Empties the window, as if preceded by zeros.
+        """
+        self._ring = None
+        self._X = None
+        self._since = 0
+
+    def process(self, block: np.array) -> np.array:
+        """
+        Returns X_k(n) for every sample of the block.
+
+        arg:    block   samples, time along axis
+
+        return:     complex, other axes of the block + (freqs, samples)
+        """
+        x = np.moveaxis(np.asarray(block), self.axis, -1)
+        lead, M = x.shape[:-1], x.shape[-1]
+        if M == 0:
+            # e.g. an empty read at the end of a stream, state is kept
+            return np.empty(lead + (len(self.k), 0), dtype=complex)
+        if self._ring is None:
+            self._ring = np.zeros(lead + (self.N,), dtype=x.dtype)
+            self._X = np.zeros(lead + (len(self.k),), dtype=complex)
+        elif self._ring.shape[:-1] != lead:
+            raise ValueError(f'block has channels {lead}, expected {self._ring.shape[:-1]}')
+        N = self.N
+
+        ext = np.concatenate((self._ring, x.astype(self._ring.dtype, copy=False)), axis=-1)
+        # y(n) = W^-N x(n) - x(n-N), frequencies before samples
+        y = self.W_N[:, None] * x[..., None, :] - ext[..., None, 0:M]
+        i = np.arange(M)
+        # W^-i, reducing k i mod N keeps the phase accurate in long blocks
+        W_i = np.exp(-2j * np.pi * np.mod(np.outer(self.k, i), N) / N)
+        X = np.cumsum(W_i * y, axis=-1)
+        X += self._X[..., None]
+        X *= np.conj(W_i) * self.W[:, None]
+
+        self._ring = ext[..., M:].copy()
+        self._X = X[..., -1]
+        self._since += M
+        if self._since >= self.resync:
+            self._X = self._ring @ self.E
+            self._since = 0
+        return X
+
+
+class Goertzel:
+    """
+    Streaming Goertzel detector: one DFT value per frequency for
+    each consecutive window of N samples, from the second order
+    resonator
+
+    s(n) = x(n) + 2 cos(w) s(n-1) - s(n-2),   w = 2 pi f / Fs
+
+    run by scipy.signal.lfilter. Windows completed inside a block
+    are filtered together as rows of a matrix, a window spanning
+    blocks carries the filter state `zi` over. O(1) per sample
+    & frequency, with real arithmetic only for real input.
+
+    arg:    freqs   frequencies to detect (Hz)
+    arg:    N       window length (samples)
+    arg:    Fs      sampling rate (Hz)
+    arg:    axis    time axis of the blocks
+    """
+
+    def __init__(self, freqs, N: int, Fs: float = 1.0, axis: int = -1):
+        self.freqs = np.atleast_1d(np.asarray(freqs, dtype=float))
+        self.N = N
+        self.Fs = Fs
+        self.axis = axis
+        self.w = 2 * np.pi * self.freqs / Fs
+        self.a = [np.array([1.0, -2 * np.cos(w), 1.0]) for w in self.w]
+        # X = exp(-j w N) (z1 + exp(-j w) z2) from the final state
+        self._c1 = np.exp(-1j * self.w * N)
+        self._c2 = np.exp(-1j * self.w * (N + 1))
+        self.reset()
+
+    def reset(self):
+        """
+        Drops the partial window.
+        """
+        self._zi = None
+        self._pos = 0
+
+    def _value(self, zf: np.array, kk: int) -> np.array:
+        # lfilter's transposed direct form state after the last
+        # sample is z1 = s(N), z2 = -s(N-1)
+        return self._c1[kk] * zf[..., 0] + self._c2[kk] * zf[..., 1]
+
+    def process(self, block: np.array) -> np.array:
+        """
+        Returns the DFT values of the windows completed by the block.
+
+        arg:    block   samples, time along axis
+
+        return:     complex, other axes of the block + (freqs, windows)
+        """
+        x = np.moveaxis(np.asarray(block), self.axis, -1)
+        lead, M = x.shape[:-1], x.shape[-1]
+        K, N = len(self.w), self.N
+        if self._zi is None:
+            self._zi = np.zeros(lead + (K, 2), dtype=np.result_type(x, float))
+        elif self._zi.shape[:-2] != lead:
+            raise ValueError(f'block has channels {lead}, expected {self._zi.shape[:-2]}')
+
+        # samples finishing the open window, whole windows, the rest
+        n_head = min(N - self._pos, M) if self._pos else 0
+        n_full = (M - n_head) // N
+        i_tail = n_head + n_full * N
+        head_done = self._pos + n_head == N
+
+        X = np.empty(lead + (K, int(head_done) + n_full), dtype=complex)
+        for kk in range(K):
+            zi = self._zi[..., kk, :]
+            cnt = 0
+            if n_head:
+                _, zi = lfilter([1.0], self.a[kk], x[..., 0:n_head], zi=zi)
+                if head_done:
+                    X[..., kk, 0] = self._value(zi, kk)
+                    zi = np.zeros_like(zi)
+                    cnt = 1
+            if n_full:
+                frames = x[..., n_head:i_tail].reshape(lead + (n_full, N))
+                _, zf = lfilter([1.0], self.a[kk], frames,
+                                zi=np.zeros(lead + (n_full, 2)))
+                X[..., kk, cnt:] = self._value(zf, kk)
+            if i_tail < M:
+                _, zi = lfilter([1.0], self.a[kk], x[..., i_tail:], zi=np.zeros_like(zi))
+            self._zi[..., kk, :] = zi
+
+        if i_tail < M:
+            self._pos = M - i_tail
+        elif n_head or n_full:
+            self._pos = 0 if head_done or n_full else self._pos + n_head
+        return X
+
+
+def rfft_bins(x: np.array, freqs, N: int, Fs: float = 1.0, hop: int = None) -> np.array:
+    """
+    Reference: DFT values at freqs of windows of N samples every
+    hop samples by a full rfft per window. freqs must fall on
+    bins, f N / Fs integer.
+
+    return:     complex (..., freqs, windows)
+    """
+    hop = hop or N
+    k = np.round(np.atleast_1d(freqs) * N / Fs).astype(int)
+    frames = np.lib.stride_tricks.sliding_window_view(x, N, axis=-1)[..., ::hop, :]
+    return np.swapaxes(np.fft.rfft(frames, axis=-1)[..., k], -1, -2)
+
+
+def main():
+    import time
+    import wfutils
+
+    # mains hum in the two MIT-BIH 100 leads, 1 sec. windows
+    Fs = 360
+    ADC_offset = 1024
+    ADC_gain = 200
+    with open('data/ecg/100.dat', 'rb') as file:
+        ECG = wfutils.read_uint12(file.read()).reshape(-1, 2).T.astype(float)
+    ECG = (ECG - ADC_offset) / ADC_gain
+    N = Fs
+    Freqs = [50, 60, 120]
+    Block = 1000        # arbitrary blocks, not aligned to windows
+
+    sdft = SlidingDFT(Freqs, N, Fs)
+    goertzel = Goertzel(Freqs, N, Fs)
+    t1 = time.perf_counter()
+    X_S = np.concatenate([sdft.process(ECG[:, cnt : cnt + Block])
+                          for cnt in range(0, ECG.shape[1], Block)], axis=-1)
+    elapsed_s = time.perf_counter() - t1
+    t1 = time.perf_counter()
+    X_G = np.concatenate([goertzel.process(ECG[:, cnt : cnt + Block])
+                          for cnt in range(0, ECG.shape[1], Block)], axis=-1)
+    elapsed_g = time.perf_counter() - t1
+
+    t1 = time.perf_counter()
+    X_F = rfft_bins(ECG, Freqs, N, Fs)
+    elapsed_f = time.perf_counter() - t1
+    t1 = time.perf_counter()
+    X_F1 = rfft_bins(ECG[:, 0 : pow(10,5)], Freqs, N, Fs, hop=1)
+    elapsed_f1 = (time.perf_counter() - t1) * ECG.shape[1] / pow(10,5)
+
+    Diff_G = np.max(np.abs(X_G - X_F))
+    # window ending at sample n is the frame starting at n - N + 1
+    Diff_S = np.max(np.abs(X_S[..., N - 1 : N - 1 + pow(10,5) - N + 1] - X_F1))
+    Samples = ECG.size
+    print(f'{ECG.shape[0]} leads x {ECG.shape[1]} samples, N = {N}, f = {Freqs} Hz')
+    print(f'{"method":<26} {"time (s)":>9} {"samples/s":>11} {"max diff":>10}')
+    print(f'{"sliding DFT, every sample":<26} {elapsed_s:>9.3f} {Samples / elapsed_s:>11.3e} {Diff_S:>10.2e}')
+    print(f'{"rfft, every sample (est.)":<26} {elapsed_f1:>9.3f} {Samples / elapsed_f1:>11.3e} {"-":>10}')
+    print(f'{"Goertzel, every window":<26} {elapsed_g:>9.3f} {Samples / elapsed_g:>11.3e} {Diff_G:>10.2e}')
+    print(f'{"rfft, every window":<26} {elapsed_f:>9.3f} {Samples / elapsed_f:>11.3e} {"-":>10}')
+
+    Amp = 2 * np.abs(X_G) / N
+    for cnt, f in enumerate(Freqs):
+        print(f'{f:>4} Hz amplitude (mV), median per lead: '
+                f'{np.median(Amp[:, cnt], axis=-1).round(5)}')
+
+
+if __name__ == '__main__':
+    main()
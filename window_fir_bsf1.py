@@ -10,7 +10,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy import signal
 
-from lti import find_bsf_cutoff, find_bsf_stopband
+from filters import Filter
 
 
 def main():
@@ -35,10 +35,10 @@ def main():
     den[0] = 1.0
     
     ### frequency response
-    f, H = signal.freqz(num, den, worN=N_FFT, fs=Fs)
-    H_abs = np.absolute(H)
-    fc_computed = find_bsf_cutoff(f, H_abs)
-    fs_computed = find_bsf_stopband(f, H_abs, As)
+    filt = Filter(num, den, Fs, band='bsf', N_FFT=2*N_FFT)
+    f, H_abs = filt.f[0:N_FFT+1], filt.H_abs[0:N_FFT+1]
+    fc_computed = filt.cutoff
+    fs_computed = filt.stopband(As)
     df_computed = [0, 0]
     df_computed[0] = fs_computed[0] - fc_computed[0]
     df_computed[1] = fc_computed[1] - fs_computed[1]
@@ -61,10 +61,10 @@ def main():
     
     ## annotations
     # fc ->
-    ax.annotate("", xy=(fc_computed[0], H_abs[np.nonzero(f==fc_computed[0])]),
-            xytext=(fc_computed[0]+250, H_abs[np.nonzero(f==fc_computed[0])]),
+    ax.annotate("", xy=(fc_computed[0], np.interp(fc_computed[0], f, H_abs)),
+            xytext=(fc_computed[0]+250, np.interp(fc_computed[0], f, H_abs)),
             arrowprops=dict(arrowstyle="->", connectionstyle="arc3"))
-    ax.text(fc_computed[0]+250, H_abs[np.nonzero(f==fc_computed[0])],
+    ax.text(fc_computed[0]+250, np.interp(fc_computed[0], f, H_abs),
         '$f_c$', color="green", fontsize=12,
         horizontalalignment="left", verticalalignment="center")
     
@@ -9,7 +9,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy import signal
 
-from lti import find_lpf_cutoff, find_lpf_stopband
+from filters import Filter
 
 
 def main():
@@ -32,10 +32,10 @@ def main():
     den[0] = 1.0
     
     ### frequency response
-    f, H = signal.freqz(num, den, worN=N_FFT, fs=Fs)
-    H_abs = np.absolute(H)
-    fc_computed = find_lpf_cutoff(f, H_abs)
-    fs_computed = find_lpf_stopband(f, H_abs, As)
+    filt = Filter(num, den, Fs, band='lpf', N_FFT=2*N_FFT)
+    f, H_abs = filt.f[0:N_FFT+1], filt.H_abs[0:N_FFT+1]
+    fc_computed = filt.cutoff
+    fs_computed = filt.stopband(As)
     df_computed = fs_computed - fc_computed
     print(f'fc_computed = {fc_computed} Hz')
     print(f'fs_computed = {fs_computed} Hz')
@@ -53,18 +53,18 @@ def main():
     
     ## annotations
     # fc ->
-    ax.annotate("", xy=(fc_computed, H_abs[np.nonzero(f==fc_computed)]),
-            xytext=(fc_computed-250, H_abs[np.nonzero(f==fc_computed)]),
+    ax.annotate("", xy=(fc_computed, np.interp(fc_computed, f, H_abs)),
+            xytext=(fc_computed-250, np.interp(fc_computed, f, H_abs)),
             arrowprops=dict(arrowstyle="->", connectionstyle="arc3"))
-    ax.text(fc_computed-250, H_abs[np.nonzero(f==fc_computed)],
+    ax.text(fc_computed-250, np.interp(fc_computed, f, H_abs),
         '$f_c$', color="green", fontsize=14,
         horizontalalignment="right", verticalalignment="center")
     
     # fs ->
-    ax.annotate("", xy=(fs_computed, H_abs[np.nonzero(f==fs_computed)]),
-            xytext=(fs_computed+250, H_abs[np.nonzero(f==fs_computed)]),
+    ax.annotate("", xy=(fs_computed, np.interp(fs_computed, f, H_abs)),
+            xytext=(fs_computed+250, np.interp(fs_computed, f, H_abs)),
             arrowprops=dict(arrowstyle="->", connectionstyle="arc3"))
-    ax.text(fs_computed+400, H_abs[np.nonzero(f==fs_computed)],
+    ax.text(fs_computed+400, np.interp(fs_computed, f, H_abs),
         '$f_s$', color="red", fontsize=14,
         horizontalalignment="right", verticalalignment="baseline")
     